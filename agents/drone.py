@@ -1,5 +1,9 @@
 import numpy as np
 import random
+from agents.visibility import get_ray_table
+from agents.path_history import PathHistory
+from core.chunked import make_grid
+from core import profiling
 
 FREE_SPACE = 0
 WALL = 1
@@ -19,22 +23,38 @@ DIRECTIONS = {
 
 
 class Drone:
-    def __init__(self, drone_id, start_pos, fov_radius=5, entry_time=0):
+    def __init__(self, drone_id, start_pos, fov_radius=5, entry_time=0, history_len=None):
         self.id = drone_id
         self.pos = start_pos  # (x, y)
         self.fov_radius = fov_radius
         self.entry_time = entry_time
         self.active = False
         self.local_map = None   # Will be initialized once we get map dimensions
-        self.path_history = [start_pos]
+        self.path_history = PathHistory(start_pos, maxlen=history_len)  # None = keep the full path
         self.collided = False
-
-    def initialize_map(self, map_shape):
-        self.local_map = np.full(map_shape, -1, dtype=np.int8)  # -1 = unknown
+        self.swept = set()  # positions this drone has already sensed from
+        self.env = None  # environment tracking this drone's cell, told when it activates
+
+    def initialize_map(self, map_shape, shared_map=None, shared_swept=None, chunk_size=None):
+        """
+        Give the drone its own map, or with shared_map make local_map an alias
+        of one swarm-wide array (and swept of one swarm-wide set) so N drones
+        cost a single map. A shared sweep then only reports cells no drone has
+        mapped yet, which is all MasterController needs. With chunk_size the
+        own map is a ChunkedGrid (see core.chunked).
+        """
+        if shared_map is not None:
+            assert shared_map.shape == tuple(map_shape)
+            self.local_map = shared_map
+            self.swept = shared_swept if shared_swept is not None else set()
+        else:
+            self.local_map = make_grid(tuple(map_shape), -1, np.int8, chunk_size)  # -1 = unknown
 
     def activate(self, current_time):
-        if current_time >= self.entry_time:
+        if not self.active and current_time >= self.entry_time:
             self.active = True
+            if self.env is not None:
+                self.env.mark_activated(self)
 
 
     def move(self, direction, env):
@@ -45,11 +65,15 @@ class Drone:
         new_x = self.pos[0] + dx
         new_y = self.pos[1] + dy
 
+        # Counted rather than timed: a check is cheaper than reading the clock
+        profiling.active.count("collision_checks")
         if env.is_collision(new_x, new_y):
             self.collided = True
             return  # Don't move into collision
         else:
+            old_pos = self.pos
             self.pos = (new_x, new_y)
+            env.mark_moved(self, old_pos)
             self.path_history.append(self.pos)
             self.collided = False
             return self.sense(env)
@@ -58,48 +82,21 @@ class Drone:
         if not self.active:
             return []
 
-        def bresenham(x0, y0, x1, y1):
-            """Yield integer coordinates on the line from (x0, y0) to (x1, y1)."""
-            dx = abs(x1 - x0)
-            dy = -abs(y1 - y0)
-            sx = 1 if x0 < x1 else -1
-            sy = 1 if y0 < y1 else -1
-            err = dx + dy
-            while True:
-                yield x0, y0
-                if x0 == x1 and y0 == y1:
-                    break
-                e2 = 2 * err
-                if e2 >= dy:
-                    err += dy
-                    x0 += sx
-                if e2 <= dx:
-                    err += dx
-                    y0 += sy
+        # The map is static: a second sweep from the same spot can't add anything
+        if self.pos in self.swept:
+            return []
+        self.swept.add(self.pos)
 
         cx, cy = self.pos
-        new_discoveries = []
-
-        for offset_y in range(-self.fov_radius, self.fov_radius + 1):
-            for offset_x in range(-self.fov_radius, self.fov_radius + 1):
-                x = cx + offset_x
-                y = cy + offset_y
-                if not (0 <= x < env.width and 0 <= y < env.height):
-                    continue
-                if offset_x ** 2 + offset_y ** 2 > self.fov_radius ** 2:
-                    continue
-
-                for lx, ly in bresenham(cx, cy, x, y):
-                    if not (0 <= lx < env.width and 0 <= ly < env.height):
-                        break
-                    val = env.get_tile(lx, ly)
-                    if self.local_map[ly, lx] != val:
-                        self.local_map[ly, lx] = val
-                        new_discoveries.append((lx, ly, val))
-                    if val in {WALL, DOOR_CLOSED}:
-                        break
-
-        return new_discoveries
+        with profiling.active.phase("sense"):
+            xs, ys, vals = env.visibility.sweep(cx, cy, get_ray_table(self.fov_radius))
+
+            # Only report cells this drone has not already mapped
+            unseen = self.local_map[ys, xs] != vals
+            xs, ys, vals = xs[unseen], ys[unseen], vals[unseen]
+            self.local_map[ys, xs] = vals
+
+        return list(zip(xs.tolist(), ys.tolist(), vals.tolist()))
 
     def get_observed_map(self):
         return self.local_map
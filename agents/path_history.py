@@ -0,0 +1,76 @@
+from array import array
+import numpy as np
+
+
+class PathHistory:
+    """
+    Compact record of the (x, y) positions a drone has visited.
+
+    Positions are stored interleaved in an array('H') (4 bytes per step
+    instead of a tuple object per step), so maps up to 65535 cells per side
+    are supported. With maxlen set, only the last maxlen positions are kept
+    in a fixed NumPy ring buffer.
+
+    Behaves like the list of tuples it replaces: append, len, indexing
+    (negative indices included), slicing (a list) and iteration all work on
+    (x, y) tuples.
+    """
+
+    def __init__(self, start_pos=None, maxlen=None):
+        self.maxlen = maxlen
+        self.total = 0  # positions ever appended, including evicted ones
+        if maxlen is None:
+            self._coords = array('H')
+        else:
+            self._ring = np.zeros((maxlen, 2), dtype=np.uint16)
+        if start_pos is not None:
+            self.append(start_pos)
+
+    def append(self, pos):
+        x, y = pos
+        if self.maxlen is None:
+            self._coords.append(x)
+            self._coords.append(y)
+        else:
+            self._ring[self.total % self.maxlen] = (x, y)
+        self.total += 1
+
+    def __len__(self):
+        if self.maxlen is None:
+            return self.total
+        return min(self.total, self.maxlen)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("path history index out of range")
+        if self.maxlen is None:
+            return self._coords[2 * i], self._coords[2 * i + 1]
+        x, y = self._ring[(self.total - n + i) % self.maxlen]
+        return int(x), int(y)
+
+    def __iter__(self):
+        if self.maxlen is None:
+            coords = iter(self._coords)
+            return zip(coords, coords)
+        return iter(map(tuple, self.as_array().tolist()))
+
+    def as_array(self):
+        """
+        (len, 2) array of (x, y), oldest first.
+        """
+        if self.maxlen is None:
+            return np.frombuffer(self._coords, dtype=np.uint16).reshape(-1, 2).copy()
+        n = len(self)
+        start = (self.total - n) % self.maxlen
+        return np.roll(self._ring, -start, axis=0)[:n]
+
+    @property
+    def nbytes(self):
+        if self.maxlen is None:
+            return self._coords.itemsize * len(self._coords)
+        return self._ring.nbytes
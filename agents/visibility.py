@@ -0,0 +1,188 @@
+import numpy as np
+from core import profiling
+
+WALL = 1
+DOOR_CLOSED = 3
+
+# Tiles that stop a ray (the blocking tile itself is still seen)
+OPAQUE_TILES = (WALL, DOOR_CLOSED)
+
+# Lookup table over int8 tile values (viewed as uint8) -> opaque?
+OPAQUE_LOOKUP = np.zeros(256, dtype=bool)
+OPAQUE_LOOKUP[list(OPAQUE_TILES)] = True
+
+# Below this many ray steps a plain loop over the table beats the NumPy
+# call overhead of the vectorized sweep (radius <= 2)
+VECTORIZE_MIN_STEPS = 40
+
+_RAY_TABLES = {}
+
+
+def bresenham(x0, y0, x1, y1):
+    """Yield integer coordinates on the line from (x0, y0) to (x1, y1)."""
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx + dy
+    while True:
+        yield x0, y0
+        if x0 == x1 and y0 == y1:
+            break
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x0 += sx
+        if e2 <= dx:
+            err += dx
+            y0 += sy
+
+
+class RayTable:
+    """
+    Precomputed Bresenham rays from the origin to every offset in a FOV disc.
+
+    Rays are stored in the same order Drone.sense has always walked them
+    (targets row by row, each ray from the center outwards), padded to a
+    common length so a whole sweep can be evaluated as one array operation.
+    """
+
+    def __init__(self, radius):
+        self.radius = radius
+
+        rays = []
+        for offset_y in range(-radius, radius + 1):
+            for offset_x in range(-radius, radius + 1):
+                if offset_x ** 2 + offset_y ** 2 > radius ** 2:
+                    continue
+                rays.append(list(bresenham(0, 0, offset_x, offset_y)))
+
+        self.rays = [tuple(ray) for ray in rays]
+        self.num_rays = len(rays)
+        self.num_steps = sum(len(ray) for ray in rays)
+        self.max_len = max(len(ray) for ray in rays)
+
+        self.dx = np.zeros((self.num_rays, self.max_len), dtype=np.int32)
+        self.dy = np.zeros((self.num_rays, self.max_len), dtype=np.int32)
+        self.valid = np.zeros((self.num_rays, self.max_len), dtype=bool)
+        for i, ray in enumerate(rays):
+            steps = np.array(ray, dtype=np.int32)
+            self.dx[i, :len(ray)] = steps[:, 0]
+            self.dy[i, :len(ray)] = steps[:, 1]
+            self.valid[i, :len(ray)] = True
+
+        # Ray targets (last step of each ray)
+        lengths = self.valid.sum(axis=1)
+        self.target_dx = self.dx[np.arange(self.num_rays), lengths - 1]
+        self.target_dy = self.dy[np.arange(self.num_rays), lengths - 1]
+
+        for arr in (self.dx, self.dy, self.valid, self.target_dx, self.target_dy):
+            arr.setflags(write=False)
+
+
+def get_ray_table(radius):
+    """
+    Return the shared RayTable for a FOV radius, building it on first use.
+    """
+    table = _RAY_TABLES.get(radius)
+    if table is None:
+        table = RayTable(radius)
+        _RAY_TABLES[radius] = table
+    return table
+
+
+class VisibilityCache:
+    """
+    Sweep results per (position, radius) for one static map, shared by all
+    drones on it. Coordinates are stored as int16 when the map allows it.
+    Once max_entries positions are cached the oldest ones are evicted.
+    """
+
+    def __init__(self, grid, max_entries=1 << 16):
+        self.grid = grid
+        self.max_entries = max_entries
+        self.coord_dtype = np.int16 if max(grid.shape) <= np.iinfo(np.int16).max else np.int32
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def sweep(self, cx, cy, table):
+        key = (cx, cy, table.radius)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            profiling.active.count("sweep_cache_hits")
+            return entry
+
+        self.misses += 1
+        profiling.active.count("rays_cast", table.num_rays)
+        xs, ys, vals = visible_cells(self.grid, cx, cy, table)
+        entry = (xs.astype(self.coord_dtype), ys.astype(self.coord_dtype), vals)
+        if len(self.entries) >= self.max_entries:
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = entry
+        return entry
+
+
+def visible_cells(grid, cx, cy, table):
+    """
+    Ray-cast a full sensor sweep from (cx, cy) over grid.
+
+    Returns (xs, ys, vals) for every visible cell, each cell listed once in
+    the order it is first reached when walking the rays.
+    """
+    if table.num_steps < VECTORIZE_MIN_STEPS:
+        return _visible_cells_scalar(grid, cx, cy, table)
+
+    height, width = grid.shape
+    r = table.radius
+    xs = cx + table.dx
+    ys = cy + table.dy
+
+    if r <= cx < width - r and r <= cy < height - r:
+        # Whole disc inside the map: no bounds handling needed
+        steps = table.valid
+        vals = grid[ys, xs]
+    else:
+        # Rays whose target falls outside the map are skipped entirely
+        tx = cx + table.target_dx
+        ty = cy + table.target_dy
+        rays_in_bounds = (tx >= 0) & (tx < width) & (ty >= 0) & (ty < height)
+        steps = table.valid & rays_in_bounds[:, None]
+        # Every step of an in-bounds ray lies inside the map; clip the rest
+        # so the gather below stays in range
+        vals = grid[np.clip(ys, 0, height - 1), np.clip(xs, 0, width - 1)]
+
+    opaque = OPAQUE_LOOKUP[vals.astype(np.uint8)] & steps
+    # A step is visible if no earlier step on its ray was opaque
+    blocked_before = (np.cumsum(opaque, axis=1) - opaque) > 0
+    seen = steps & ~blocked_before
+
+    xs, ys, vals = xs[seen], ys[seen], vals[seen]
+    _, first = np.unique(ys * width + xs, return_index=True)
+    first.sort()
+
+    return xs[first], ys[first], vals[first]
+
+
+def _visible_cells_scalar(grid, cx, cy, table):
+    height, width = grid.shape
+    tile = grid.item
+    seen = {}
+
+    for ray in table.rays:
+        tx, ty = ray[-1]
+        if not (0 <= cx + tx < width and 0 <= cy + ty < height):
+            continue
+        for dx, dy in ray:
+            x, y = cx + dx, cy + dy
+            val = tile(y, x)
+            if (x, y) not in seen:
+                seen[(x, y)] = val
+            if val in OPAQUE_TILES:
+                break
+
+    xs = np.fromiter((x for x, _ in seen), dtype=np.intp, count=len(seen))
+    ys = np.fromiter((y for _, y in seen), dtype=np.intp, count=len(seen))
+    vals = np.fromiter(seen.values(), dtype=grid.dtype, count=len(seen))
+    return xs, ys, vals
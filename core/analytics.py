@@ -0,0 +1,106 @@
+import os
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from core.results_store import ResultsStore, KEY
+
+try:
+    from scipy.stats import t as student_t
+except ImportError:
+    student_t = None
+
+CONFIDENCE = 0.95
+DEFAULT_POLICY = "frontier"  # assumed for results written before the policy column
+GROUP = ["map", "drones", "policy"]
+
+# All aggregates are single groupby passes over the whole frame; nothing
+# loops over groups in Python.
+
+
+def load_results(path):
+    """
+    Runs from a ResultsStore directory or a flat CSV: sweep CSVs, or older
+    files like outputs/slam_results.csv whose metric column is "time".
+    """
+    if os.path.isdir(path):
+        return ResultsStore(path).runs()
+    df = pd.read_csv(path)
+    if "policy" not in df:
+        df["policy"] = DEFAULT_POLICY
+    if "status" not in df:
+        value = "time" if "time" in df else "wall_time"
+        df["status"] = np.where(df[value].notnull(), "solved", "not solved")
+    if "iteration" in df:
+        # Drop lines cut off by an interrupted sweep; a retried error is replaced by its rerun
+        df = df[df["status"].isin(["solved", "not solved", "error"])].dropna(subset=KEY)
+        df = df.astype({name: "int64" for name in KEY if name != "policy"})
+        df = df.drop_duplicates(KEY, keep="last", ignore_index=True)
+    return df
+
+
+def confidence_interval(std, n, confidence=CONFIDENCE):
+    """
+    Half-width of the confidence interval of a mean, elementwise over arrays
+    of standard deviations and sample sizes: Student's t with scipy, the
+    normal approximation without. NaN for groups of one.
+    """
+    n = np.asarray(n, dtype=float)
+    if student_t is not None:
+        q = student_t.ppf((1 + confidence) / 2, np.maximum(n - 1, 1))
+    else:
+        q = NormalDist().inv_cdf((1 + confidence) / 2)
+    return q * np.asarray(std, dtype=float) / np.sqrt(n)
+
+
+def summarize(df, value="wall_time", by=GROUP, confidence=CONFIDENCE):
+    """
+    Per group of by: run count, success rate (value present), and count,
+    mean, std, median, min, max and confidence interval of value over the
+    solved runs.
+    """
+    by = list(by)
+    rates = (df.assign(solved=df[value].notnull())
+             .groupby(by, observed=True)["solved"].agg(runs="size", success_rate="mean"))
+    stats = (df[df[value].notnull()]
+             .groupby(by, observed=True)[value].agg(["count", "mean", "std", "median", "min", "max"]))
+    summary = rates.join(stats).reset_index()
+    half = confidence_interval(summary["std"], summary["count"], confidence)
+    summary["ci_low"] = summary["mean"] - half
+    summary["ci_high"] = summary["mean"] + half
+    return summary
+
+
+def improvement(summary, value="mean", over="drones", by=("map", "policy")):
+    """
+    summary plus relative_improvement: how much value dropped (in %) from
+    the previous level of over within each group of by, e.g. the speed-up
+    of each map from one drone count to the next. NaN for the first level.
+    """
+    by = list(by)
+    ordered = summary.sort_values(by + [over])
+    previous = ordered.groupby(by, observed=True)[value].shift(1)
+    return ordered.assign(relative_improvement=(previous - ordered[value]) / previous * 100)
+
+
+def coverage_curves(coverage, by=("drones", "policy"), confidence=CONFIDENCE):
+    """
+    Mean coverage per tick, with its confidence interval, over the runs of
+    each group of by (coverage is ResultsStore.coverage()). A run that
+    finished early counts with its final coverage for the later ticks.
+    """
+    by = list(by)
+    wide = coverage.pivot_table(index=KEY, columns="tick", values="coverage", observed=True).ffill(axis=1)
+    long = wide.stack().rename("coverage").reset_index()
+    curves = long.groupby(by + ["tick"], observed=True)["coverage"].agg(["count", "mean", "std"]).reset_index()
+    half = confidence_interval(curves["std"], curves["count"], confidence)
+    curves["ci_low"] = curves["mean"] - half
+    curves["ci_high"] = curves["mean"] + half
+    return curves
+
+
+def ticks_to_coverage(coverage, level=0.9):
+    """
+    First tick at which each run reached level coverage (runs that never
+    did are left out), indexed by run.
+    """
+    return coverage[coverage["coverage"] >= level].groupby(KEY, observed=True)["tick"].min().rename("ticks")
@@ -0,0 +1,78 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment as _scipy_assignment
+except ImportError:  # scipy is optional
+    _scipy_assignment = None
+
+
+def linear_sum_assignment(cost):
+    """
+    Minimum-cost assignment of rows to columns (Hungarian algorithm).
+
+    cost is an (n, m) array; every row is assigned when n <= m, every
+    column otherwise. Returns (rows, cols) index arrays like
+    scipy.optimize.linear_sum_assignment, which is used when installed.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if _scipy_assignment is not None:
+        return _scipy_assignment(cost)
+    if cost.shape[0] == 1:
+        return np.zeros(1, dtype=np.int64), cost[0].argmin(keepdims=True)
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    cols = _hungarian(cost)
+    rows = np.arange(cost.shape[0])
+    if transposed:
+        order = np.argsort(cols)
+        return cols[order], rows[order]
+    return rows, cols
+
+
+def _hungarian(cost):
+    """
+    Shortest augmenting path Hungarian algorithm with potentials, O(n^2 m)
+    for n <= m. Returns the column assigned to each row.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.int64)  # column -> row (1-based, 0 = free)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_v = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < min_v[1:])
+            min_v[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, min_v[1:], np.inf)
+            j1 = int(candidates.argmin()) + 1
+            delta = candidates[j1 - 1]
+
+            u[match[used]] += delta
+            v[used] -= delta
+            min_v[1:][free] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    assigned = np.flatnonzero(match[1:])
+    cols = np.empty(n, dtype=np.int64)
+    cols[match[1:][assigned] - 1] = assigned
+    return cols
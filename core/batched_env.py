@@ -0,0 +1,299 @@
+import random
+import time
+import numpy as np
+from agents.visibility import get_ray_table, OPAQUE_LOOKUP
+from core.grid_map_env import WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+from core.grid_utils import dilate
+from core.sim_runner import make_env, compute_reachable_mask, MAX_TICKS
+
+BLOCKING_TILES = [WALL, DOOR_CLOSED, OUT_OF_BOUNDS]
+
+# Direction codes, same order as policies.DIRECTIONS
+UP, DOWN, LEFT, RIGHT, STAY = range(5)
+DELTAS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0), (0, 0)], dtype=np.int64)
+
+UNREACHED = np.iinfo(np.int32).max // 2  # headroom so UNREACHED + 1 cannot overflow
+
+
+class BatchedGridEnv:
+    """
+    B independent simulations advanced in lockstep with array operations.
+
+    All maps are padded to a common (H, W) with OUT_OF_BOUNDS and every
+    environment has the same number of drones N. State lives in stacked
+    arrays instead of GridMapEnv/Drone objects:
+
+        grid        (B, H, W)  true tiles
+        global_map  (B, H, W)  merged observations, -1 = unknown
+        pos         (B, N, 2)  drone (x, y)
+        active      (B, N)
+        occupancy   (B, H, W)  active drones per cell
+
+    Drones keep no local maps here: sensing writes straight into global_map.
+    Within a tick drones move one index at a time (all environments at once),
+    so drone n sees the moves of drones < n exactly like MasterController.step.
+    """
+
+    def __init__(self, grids, start_positions, entry_times, fov, reachable_masks):
+        self.batch_size = len(grids)
+        self.num_drones = len(entry_times)
+        self.height = max(g.shape[0] for g in grids)
+        self.width = max(g.shape[1] for g in grids)
+        B, H, W = self.batch_size, self.height, self.width
+
+        self.grid = np.full((B, H, W), OUT_OF_BOUNDS, dtype=np.int8)
+        self.inside = np.zeros((B, H, W), dtype=bool)  # False on padding
+        self.reachable = np.zeros((B, H, W), dtype=bool)
+        self.heights = np.array([g.shape[0] for g in grids])
+        self.widths = np.array([g.shape[1] for g in grids])
+        for b, (g, mask) in enumerate(zip(grids, reachable_masks)):
+            self.grid[b, :g.shape[0], :g.shape[1]] = g
+            self.inside[b, :g.shape[0], :g.shape[1]] = True
+            self.reachable[b, :g.shape[0], :g.shape[1]] = mask
+        self.blocked = np.isin(self.grid, BLOCKING_TILES)
+
+        self.pos = np.array(start_positions, dtype=np.int64).reshape(B, self.num_drones, 2)
+        self.entry_times = np.asarray(entry_times)
+        self.active = np.zeros((B, self.num_drones), dtype=bool)
+        self.occupancy = np.zeros((B, H, W), dtype=np.int16)
+
+        self.global_map = np.full((B, H, W), -1, dtype=np.int8)
+        self.known_reachable = np.zeros(B, dtype=np.int64)
+        self.total_reachable = self.reachable.sum(axis=(1, 2))
+        self.completion_tick = np.full(B, -1, dtype=np.int64)
+        self.tick = 0
+
+        self.table = get_ray_table(fov)
+        self.env_index = np.arange(B)
+
+    @classmethod
+    def from_envs(cls, envs):
+        """
+        Stack already-built GridMapEnv instances (same drone count and FOV).
+        """
+        grids = [env.grid for env in envs]
+        starts = [[d.pos for d in env.drones] for env in envs]
+        entry_times = [d.entry_time for d in envs[0].drones]
+        fov = envs[0].drones[0].fov_radius
+        masks = [compute_reachable_mask(env) for env in envs]
+        return cls(grids, starts, entry_times, fov, masks)
+
+    @property
+    def done(self):
+        return self.completion_tick >= 0
+
+    @property
+    def coverage(self):
+        return np.minimum(self.known_reachable / self.total_reachable, 1.0)
+
+    def is_free(self, b, x, y):
+        """
+        Vectorized GridMapEnv.is_collision negation for env indices b.
+        """
+        inside = (x >= 0) & (x < self.widths[b]) & (y >= 0) & (y < self.heights[b])
+        cx = np.clip(x, 0, self.width - 1)
+        cy = np.clip(y, 0, self.height - 1)
+        return inside & ~self.blocked[b, cy, cx] & (self.occupancy[b, cy, cx] == 0)
+
+    def activate(self):
+        newly = ~self.active & (self.tick >= self.entry_times)[None, :]
+        b, n = np.nonzero(newly)
+        np.add.at(self.occupancy, (b, self.pos[b, n, 1], self.pos[b, n, 0]), 1)
+        self.active |= newly
+
+    def move(self, n, directions):
+        """
+        Move drone n in every environment; directions is a (B,) array of codes.
+        Returns the (B,) mask of drones that actually moved.
+        """
+        b = self.env_index
+        x, y = self.pos[:, n, 0], self.pos[:, n, 1]
+        delta = DELTAS[directions]
+        nx, ny = x + delta[:, 0], y + delta[:, 1]
+
+        # Like Drone.move, STAY collides with the drone itself
+        moved = self.active[:, n] & ~self.done & self.is_free(b, nx, ny)
+        b, x, y, nx, ny = b[moved], x[moved], y[moved], nx[moved], ny[moved]
+        self.occupancy[b, y, x] -= 1
+        self.occupancy[b, ny, nx] += 1
+        self.pos[b, n, 0] = nx
+        self.pos[b, n, 1] = ny
+
+        if len(b):
+            self.sense(b, nx, ny)
+        return moved
+
+    def sense(self, b, cx, cy):
+        """
+        One sensor sweep per (b, cx, cy) using the shared ray table, merged
+        into global_map.
+        """
+        table = self.table
+        H, W = self.height, self.width
+        b3 = b[:, None, None]
+
+        tx = cx[:, None] + table.target_dx
+        ty = cy[:, None] + table.target_dy
+        rays_in_bounds = (tx >= 0) & (tx < self.widths[b][:, None]) & (ty >= 0) & (ty < self.heights[b][:, None])
+        steps = table.valid & rays_in_bounds[:, :, None]
+
+        xs = np.clip(cx[:, None, None] + table.dx, 0, W - 1)
+        ys = np.clip(cy[:, None, None] + table.dy, 0, H - 1)
+        vals = self.grid[b3, ys, xs]
+
+        opaque = OPAQUE_LOOKUP[vals.astype(np.uint8)] & steps
+        seen = steps & ~((np.cumsum(opaque, axis=2) - opaque) > 0)
+
+        flat, first = np.unique(((b3 * H + ys) * W + xs)[seen], return_index=True)
+        vals = vals[seen][first]
+
+        global_flat = self.global_map.reshape(-1)
+        new = global_flat[flat] == -1
+        flat = flat[new]
+        global_flat[flat] = vals[new]
+
+        counted = flat[self.reachable.reshape(-1)[flat]]
+        self.known_reachable += np.bincount(counted // (H * W), minlength=self.batch_size)
+
+    def step(self, policy):
+        self.activate()
+        policy.prepare(self)
+        for n in range(self.num_drones):
+            self.move(n, policy.choose(self, n))
+        self.tick += 1
+
+        finished = ~self.done & (self.known_reachable >= self.total_reachable)
+        self.completion_tick[finished] = self.tick
+
+
+class BatchedRandomPolicy:
+    """
+    MasterController.random_walk for all environments: a uniformly random
+    non-colliding direction, or STAY if every direction is blocked.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def prepare(self, env):
+        pass
+
+    def choose(self, env, n):
+        b = env.env_index[:, None]
+        cand = env.pos[:, n, None, :] + DELTAS[None, :, :]
+        free = env.is_free(b, cand[:, :, 0], cand[:, :, 1])
+        priority = np.where(free, self.rng.random(free.shape), np.inf)
+        return np.where(free.any(axis=1), priority.argmin(axis=1), STAY)
+
+
+class BatchedNearestFrontierPolicy:
+    """
+    Every drone steps towards its nearest frontier. An approximation of
+    FrontierPolicy, not the same policy: drones don't claim goals, so
+    several can chase the same frontier, and they don't wait for each
+    other. Results differ from run_headless(policy="frontier").
+
+    Once per tick a multi-source BFS wave from all frontier cells is grown
+    for all environments at once (shifted boolean masks over the (B, H, W)
+    stack, unknown cells passable as in a_star), giving every drone its
+    true distance to the nearest frontier. Each drone then steps to the
+    free neighbour with the smallest distance. It random-walks when no
+    frontier is reachable, or when the neighbours closer to one are taken
+    by other drones.
+    """
+
+    def __init__(self, seed=None):
+        self.fallback = BatchedRandomPolicy(seed)
+        self.distance = None
+
+    def prepare(self, env):
+        global_map = env.global_map
+        known = global_map != -1
+
+        unknown = ~known & env.reachable
+        frontier = known & ~env.blocked & dilate(unknown)
+
+        passable = env.inside & ~np.isin(global_map, BLOCKING_TILES)
+        dist = np.full(global_map.shape, UNREACHED, dtype=np.int32)
+        dist[frontier] = 0
+
+        # Grow the wave one ring per iteration and stop as soon as every live
+        # drone has been reached: its neighbours one step closer to a frontier
+        # are then already labelled, which is all choose() looks at. Envs whose
+        # drones are all reached drop out of the working set, so a single far
+        # away drone doesn't keep the whole batch iterating.
+        live_b, live_n = np.nonzero(env.active & ~env.done[:, None])
+        drone_y, drone_x = env.pos[live_b, live_n, 1], env.pos[live_b, live_n, 0]
+
+        envs = env.env_index
+        ring, reached, wave_dist = frontier, frontier.copy(), dist
+        k = 0
+        while True:
+            unreached = ~reached[np.searchsorted(envs, live_b), drone_y, drone_x]
+            pending = np.unique(live_b[unreached])
+            live_b, drone_y, drone_x = live_b[unreached], drone_y[unreached], drone_x[unreached]
+            if not len(pending):
+                break
+            if len(pending) < len(envs):
+                keep = np.searchsorted(envs, pending)
+                dist[envs] = wave_dist
+                envs, ring, reached, passable, wave_dist = (
+                    pending, ring[keep], reached[keep], passable[keep], wave_dist[keep])
+            if not ring.any():
+                break
+
+            k += 1
+            ring = dilate(ring) & passable & ~reached
+            reached |= ring
+            wave_dist[ring] = k
+
+        dist[envs] = wave_dist
+        self.distance = dist
+
+    def choose(self, env, n):
+        b = env.env_index[:, None]
+        cand = env.pos[:, n, None, :] + DELTAS[None, :4, :]
+        free = env.is_free(b, cand[:, :, 0], cand[:, :, 1])
+        cx = np.clip(cand[:, :, 0], 0, env.width - 1)
+        cy = np.clip(cand[:, :, 1], 0, env.height - 1)
+        dist = np.where(free, self.distance[b, cy, cx], UNREACHED)
+
+        best = dist.argmin(axis=1)
+        has_goal = dist[env.env_index, best] < UNREACHED
+        return np.where(has_goal, best, self.fallback.choose(env, n))
+
+
+BATCHED_POLICIES = {
+    "random": BatchedRandomPolicy,
+    "nearest_frontier": BatchedNearestFrontierPolicy,
+}
+
+
+def run_batched(map_paths, num_drones=3, num_entry_points=1, fov=1, policy="nearest_frontier",
+                max_ticks=MAX_TICKS, seed=None):
+    """
+    Run one simulation per map path in lockstep. Returns a list of per-run
+    metrics shaped like run_headless results (wall_time is shared by the batch).
+    A seed makes the batch reproducible; run i draws from random.Random(seed + i).
+    """
+    envs = [make_env(path, num_drones=num_drones, num_entry_points=num_entry_points, fov=fov,
+                     rng=random.Random(seed + i) if seed is not None else None)
+            for i, path in enumerate(map_paths)]
+    batch = BatchedGridEnv.from_envs(envs)
+    planner = BATCHED_POLICIES[policy](seed)
+
+    start_time = time.perf_counter()
+    while batch.tick < max_ticks and not batch.done.all():
+        batch.step(planner)
+    wall_time = time.perf_counter() - start_time
+
+    return [
+        {
+            "completed": bool(done),
+            "ticks": int(ticks) if done else None,
+            "ticks_run": int(ticks) if done else batch.tick,
+            "wall_time": wall_time,
+            "ticks_per_sec": batch.tick / wall_time if wall_time > 0 else float("inf"),
+        }
+        for done, ticks in zip(batch.done, batch.completion_tick)
+    ]
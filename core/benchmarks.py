@@ -0,0 +1,284 @@
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import numpy as np
+from agents.visibility import VisibilityCache, get_ray_table
+from core.master_controller import MasterController
+from core.planner import a_star
+from core.policies import POLICIES
+from core.sim_runner import make_env, compute_reachable_mask
+
+FREE_SPACE = 0
+
+ENTRY_POINTS = 4      # entry points of the generated benchmark maps
+SENSE_POSITIONS = 500
+SWEEP_BATCHES = 200   # sensor sweeps merged per frontier_update run
+PATH_PAIRS = 20
+MIN_TIME = 0.05       # cheap benchmarks are looped for at least this long per repeat
+THRESHOLD = 0.25      # relative slowdown reported as a regression
+
+
+def _env(size, drones=1, fov=1, seed=0):
+    """
+    Seeded random size x size map (see GridMapEnv.generate_random_map).
+    """
+    return make_env(None, size, size, drones, ENTRY_POINTS, fov, rng=random.Random(seed))
+
+
+def _cells(mask, count, seed):
+    """
+    Up to count distinct (x, y) cells of mask, drawn with a fixed seed.
+    """
+    ys, xs = np.nonzero(mask)
+    pick = np.random.default_rng(seed).choice(len(ys), min(count, len(ys)), replace=False)
+    return list(zip(xs[pick].tolist(), ys[pick].tolist()))
+
+
+# Benchmarks take their parameters plus a seed and return (seconds, ops): the
+# time spent in the measured code only, and how many operations it covered.
+
+def bench_sense(size, fov, seed=0):
+    """
+    Drone.sense from SENSE_POSITIONS free cells with a cold sweep cache.
+    """
+    env = _env(size, 1, fov, seed)
+    drone = env.drones[0]
+    drone.activate(0)
+    cells = _cells(env.grid == FREE_SPACE, SENSE_POSITIONS, seed)
+    start = time.perf_counter()
+    for cell in cells:
+        drone.pos = cell
+        drone.sense(env)
+    return time.perf_counter() - start, len(cells)
+
+
+def bench_frontier_update(size, fov, seed=0):
+    """
+    MasterController._update_frontiers after each of SWEEP_BATCHES sensor
+    sweeps is written into the global map.
+    """
+    env = _env(size, 1, fov, seed)
+    master = MasterController(env, compute_reachable_mask(env), mode="random")
+    table = get_ray_table(fov)
+    sweeps = VisibilityCache(env.grid)
+    elapsed = 0.0
+    cells = _cells(env.grid == FREE_SPACE, SWEEP_BATCHES, seed)
+    for cx, cy in cells:
+        xs, ys, vals = sweeps.sweep(cx, cy, table)
+        unknown = master.global_map[ys, xs] == -1
+        xs, ys = xs[unknown], ys[unknown]
+        master.global_map[ys, xs] = vals[unknown]
+        start = time.perf_counter()
+        master._update_frontiers(zip(xs.tolist(), ys.tolist()))
+        elapsed += time.perf_counter() - start
+    return elapsed, len(cells)
+
+
+def bench_a_star(size, seed=0):
+    """
+    a_star on the fully known map between PATH_PAIRS pairs of reachable cells.
+    """
+    env = _env(size, 1, 1, seed)
+    cells = _cells(compute_reachable_mask(env) & (env.grid == FREE_SPACE), 2 * PATH_PAIRS, seed)
+    pairs = list(zip(cells[::2], cells[1::2]))
+    start = time.perf_counter()
+    for a, b in pairs:
+        a_star(a, b, env.grid)
+    return time.perf_counter() - start, len(pairs)
+
+
+def bench_reachable_mask(size, seed=0):
+    """
+    compute_reachable_mask on a generated map (no map file, so no cache).
+    """
+    env = _env(size, 1, 1, seed)
+    ops = 0
+    start = time.perf_counter()
+    while True:
+        compute_reachable_mask(env)
+        ops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME:
+            return elapsed, ops
+
+
+def bench_ticks(size, drones, fov, policy, ticks, seed=0):
+    """
+    Full simulation ticks (sense, plan, move, merge) of the whole swarm:
+    drones enter two ticks apart, so the ticks until the last one has
+    entered are run untimed, then up to ticks ticks are timed (fewer if
+    the map is fully explored before).
+    """
+    env = make_env(None, size, size, drones, ENTRY_POINTS, fov, rng=random.Random(seed))
+    master = MasterController(env, compute_reachable_mask(env), mode=policy)
+    warmup = max(d.entry_time for d in env.drones) + 1
+    for tick in range(warmup):
+        master.step(tick)
+    start = time.perf_counter()
+    for tick in range(warmup, warmup + ticks):
+        master.step(tick)
+        if master.known_reachable >= master.total_reachable:
+            break
+    return time.perf_counter() - start, tick - warmup + 1
+
+
+BENCHMARKS = {
+    "sense": bench_sense,
+    "frontier_update": bench_frontier_update,
+    "a_star": bench_a_star,
+    "reachable_mask": bench_reachable_mask,
+    "ticks": bench_ticks,
+}
+
+
+def _grid(**axes):
+    """
+    Every combination of the given parameter values, as dicts.
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+SIZES = (32, 128, 512, 1024)
+
+SUITES = {
+    # A minute or so; for checking a change to a hot path
+    "quick": {
+        "sense": _grid(size=(32, 128), fov=(1, 3)),
+        "frontier_update": _grid(size=(32, 128), fov=(1,)),
+        "a_star": _grid(size=(32, 128)),
+        "reachable_mask": _grid(size=(32, 128)),
+        "ticks": _grid(size=(32,), drones=(1, 4), fov=(1,), policy=("frontier",), ticks=(200,)),
+    },
+    # Scaling up to 1024^2 maps and 256 drones. The whole-map planners are only
+    # run up to 128^2; beyond that the ticks use the hierarchical policy. Ticks
+    # are timed once every drone has entered (see bench_ticks).
+    "full": {
+        "sense": _grid(size=SIZES, fov=(1, 3, 5)),
+        "frontier_update": _grid(size=SIZES, fov=(1, 3)),
+        "a_star": _grid(size=SIZES),
+        "reachable_mask": _grid(size=SIZES),
+        "ticks": (_grid(size=(32, 128), drones=(1, 4, 16), fov=(1, 3), policy=("frontier",), ticks=(100,))
+                  + _grid(size=(512, 1024), drones=(16, 64, 256), fov=(1,), policy=("hierarchical",), ticks=(20,))),
+    },
+    # Every registered policy on the same map and swarm
+    "policies": {
+        "ticks": _grid(size=(32, 64), drones=(4,), fov=(1,), policy=sorted(POLICIES), ticks=(200,)),
+    },
+}
+
+
+def case_key(name, params):
+    """
+    Identifies a benchmark case across result files, e.g. "a_star[size=128]".
+    """
+    return name + "[" + ",".join(f"{k}={params[k]}" for k in sorted(params)) + "]"
+
+
+def run_case(name, params, repeats=3, seed=0):
+    """
+    Run one benchmark case repeats times. The best time per op is the
+    figure compared between runs; the median is kept to show the noise.
+    """
+    per_op = []
+    ops = 0
+    for _ in range(repeats):
+        seconds, ops = BENCHMARKS[name](**params, seed=seed)
+        per_op.append(seconds / max(ops, 1))
+    return {
+        "benchmark": name,
+        "params": params,
+        "key": case_key(name, params),
+        "time": min(per_op),
+        "median": statistics.median(per_op),
+        "ops": ops,
+        "repeats": repeats,
+    }
+
+
+def run_suite(suite="quick", repeats=3, seed=0, only=None, on_result=None):
+    """
+    Run every case of a suite (a name from SUITES or a dict like its
+    values), optionally only the benchmarks named in only. on_result(entry)
+    is called after each case. Returns the results document (see save_results).
+    """
+    cases = SUITES[suite] if isinstance(suite, str) else suite
+    results = []
+    for name, param_sets in cases.items():
+        if only is not None and name not in only:
+            continue
+        for params in param_sets:
+            entry = run_case(name, params, repeats, seed)
+            results.append(entry)
+            if on_result is not None:
+                on_result(entry)
+    return {
+        "meta": {
+            "suite": suite if isinstance(suite, str) else "custom",
+            "seed": seed,
+            "repeats": repeats,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def save_results(path, document):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(document, baseline, threshold=THRESHOLD):
+    """
+    Compare the best time per op of every case against a baseline document.
+    Returns rows (key, baseline time, current time, ratio, status), status
+    being "regression" (ratio above 1 + threshold), "improvement" (below
+    1 / (1 + threshold)), "ok", or "new" for cases missing from the baseline.
+    """
+    before = {entry["key"]: entry["time"] for entry in baseline["results"]}
+    rows = []
+    for entry in document["results"]:
+        old = before.get(entry["key"])
+        if old is None:
+            rows.append((entry["key"], None, entry["time"], None, "new"))
+            continue
+        ratio = entry["time"] / old if old > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append((entry["key"], old, entry["time"], ratio, status))
+    return rows
+
+
+def format_time(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def format_comparison(rows):
+    width = max([len(row[0]) for row in rows] + [4])
+    lines = [f"{'case':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>6}  status"]
+    for key, old, new, ratio, status in rows:
+        shown = f"{ratio:.2f}" if ratio is not None else "-"
+        lines.append(f"{key:<{width}}  {format_time(old):>10}  {format_time(new):>10}  {shown:>6}  {status}")
+    return "\n".join(lines)
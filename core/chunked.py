@@ -0,0 +1,188 @@
+import numpy as np
+
+CHUNK_SIZE = 64  # side of the square chunks
+
+_INTS = (int, np.integer)
+
+
+class ChunkedGrid:
+    """
+    2-D grid stored as fixed-size square chunks in a dict, so only the parts
+    that were written cost memory. A chunk that was never written reads as
+    fill. With init(y0, y1, x0, x1), chunks are instead derived from other
+    data on first access (reads included), e.g. a passability mask computed
+    from a memory-mapped map one chunk at a time.
+
+    Supports the indexing the simulator uses on its dense int8 maps:
+        grid[y, x]              ints, read and write
+        grid[ys, xs]            index arrays, read (new array) and write
+        grid[y0:y1, x0:x1]      slices, read (dense copy) and write
+    Indices must be in bounds and non-negative. np.asarray(grid) builds the
+    full dense array, for code that needs one (small maps only).
+    """
+
+    ndim = 2
+
+    def __init__(self, shape, fill=-1, dtype=np.int8, chunk_size=CHUNK_SIZE, init=None):
+        self.shape = tuple(shape)
+        self.height, self.width = self.shape
+        self.fill = fill
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self.cols = -(-self.width // chunk_size)
+        self.init = init
+        self.chunks = {}  # row * cols + col -> (chunk_size, chunk_size) array
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    def _chunk(self, key, create):
+        chunk = self.chunks.get(key)
+        if chunk is None and (create or self.init is not None):
+            size = self.chunk_size
+            chunk = np.full((size, size), self.fill, dtype=self.dtype)
+            if self.init is not None:
+                row, col = divmod(key, self.cols)
+                y0, x0 = row * size, col * size
+                y1, x1 = min(y0 + size, self.height), min(x0 + size, self.width)
+                chunk[:y1 - y0, :x1 - x0] = self.init(y0, y1, x0, x1)
+            self.chunks[key] = chunk
+        return chunk
+
+    def _keys(self, ys, xs):
+        size = self.chunk_size
+        return (ys // size) * self.cols + xs // size
+
+    def __getitem__(self, index):
+        y, x = index
+        if isinstance(y, slice) or isinstance(x, slice):
+            return self._read_block(y, x)
+        if isinstance(y, _INTS) and isinstance(x, _INTS):
+            size = self.chunk_size
+            chunk = self._chunk((y // size) * self.cols + x // size, False)
+            if chunk is None:
+                return self.dtype.type(self.fill)
+            return chunk[y % size, x % size]
+
+        ys, xs = np.broadcast_arrays(np.asarray(y), np.asarray(x))
+        out = np.full(ys.shape, self.fill, dtype=self.dtype)
+        if ys.size == 0:
+            return out
+        size = self.chunk_size
+        keys = self._keys(ys, xs)
+        first = keys.flat[0]
+        if (keys == first).all():
+            # Common case: a sensor sweep inside one chunk
+            chunk = self._chunk(int(first), False)
+            if chunk is not None:
+                out[...] = chunk[ys % size, xs % size]
+            return out
+        for key in np.unique(keys).tolist():
+            chunk = self._chunk(key, False)
+            if chunk is not None:
+                sel = keys == key
+                out[sel] = chunk[ys[sel] % size, xs[sel] % size]
+        return out
+
+    def __setitem__(self, index, value):
+        y, x = index
+        if isinstance(y, slice) or isinstance(x, slice):
+            self._write_block(y, x, value)
+            return
+        size = self.chunk_size
+        if isinstance(y, _INTS) and isinstance(x, _INTS):
+            self._chunk((y // size) * self.cols + x // size, True)[y % size, x % size] = value
+            return
+
+        ys, xs = np.broadcast_arrays(np.asarray(y), np.asarray(x))
+        if ys.size == 0:
+            return
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), ys.shape)
+        keys = self._keys(ys, xs)
+        for key in np.unique(keys).tolist():
+            sel = keys == key
+            self._chunk(key, True)[ys[sel] % size, xs[sel] % size] = value[sel]
+
+    def _blocks(self, ys, xs):
+        """
+        (key, chunk rows, chunk cols, block rows, block cols) for every chunk
+        overlapping the slices ys, xs.
+        """
+        y0, y1, _ = ys.indices(self.height)
+        x0, x1, _ = xs.indices(self.width)
+        size = self.chunk_size
+        for cy in range(y0 // size, -(-y1 // size)):
+            top, bottom = max(y0, cy * size), min(y1, (cy + 1) * size)
+            for cx in range(x0 // size, -(-x1 // size)):
+                left, right = max(x0, cx * size), min(x1, (cx + 1) * size)
+                yield (cy * self.cols + cx,
+                       slice(top - cy * size, bottom - cy * size), slice(left - cx * size, right - cx * size),
+                       slice(top - y0, bottom - y0), slice(left - x0, right - x0))
+
+    def _read_block(self, ys, xs):
+        ys = ys if isinstance(ys, slice) else slice(ys, ys + 1)
+        xs = xs if isinstance(xs, slice) else slice(xs, xs + 1)
+        y0, y1, _ = ys.indices(self.height)
+        x0, x1, _ = xs.indices(self.width)
+        out = np.full((max(y1 - y0, 0), max(x1 - x0, 0)), self.fill, dtype=self.dtype)
+        for key, chunk_rows, chunk_cols, rows, cols in self._blocks(ys, xs):
+            chunk = self._chunk(key, False)
+            if chunk is not None:
+                out[rows, cols] = chunk[chunk_rows, chunk_cols]
+        return out
+
+    def _write_block(self, ys, xs, value):
+        ys = ys if isinstance(ys, slice) else slice(ys, ys + 1)
+        xs = xs if isinstance(xs, slice) else slice(xs, xs + 1)
+        y0, y1, _ = ys.indices(self.height)
+        x0, x1, _ = xs.indices(self.width)
+        value = np.broadcast_to(np.asarray(value, dtype=self.dtype), (max(y1 - y0, 0), max(x1 - x0, 0)))
+        for key, chunk_rows, chunk_cols, rows, cols in self._blocks(ys, xs):
+            self._chunk(key, True)[chunk_rows, chunk_cols] = value[rows, cols]
+
+    @property
+    def flat(self):
+        """
+        Read-only view indexed by flat cell id y * width + x, like a
+        memoryview of a dense map.
+        """
+        return FlatView(self)
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self[0:self.height, 0:self.width]
+        return dense if dtype is None else dense.astype(dtype)
+
+    def nonfill(self):
+        """
+        (ys, xs) of every cell that differs from fill.
+        """
+        ys, xs = [], []
+        size = self.chunk_size
+        for key, chunk in self.chunks.items():
+            row, col = divmod(key, self.cols)
+            cy, cx = np.nonzero(chunk != self.fill)
+            inside = (cy + row * size < self.height) & (cx + col * size < self.width)
+            ys.append(cy[inside] + row * size)
+            xs.append(cx[inside] + col * size)
+        if not ys:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(ys), np.concatenate(xs)
+
+
+class FlatView:
+    def __init__(self, grid):
+        self.grid = grid
+        self.width = grid.width
+
+    def __getitem__(self, i):
+        return self.grid[i // self.width, i % self.width]
+
+
+def make_grid(shape, fill, dtype=np.int8, chunk_size=None):
+    """
+    Dense array, or a ChunkedGrid when chunk_size is given.
+    """
+    if chunk_size:
+        return ChunkedGrid(shape, fill, dtype, chunk_size)
+    return np.full(shape, fill, dtype=dtype)
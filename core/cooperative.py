@@ -0,0 +1,202 @@
+import heapq
+import numpy as np
+from itertools import count
+from core import profiling
+from core.planner import GridPlanner
+
+WINDOW = 8  # space-time planning horizon in ticks
+
+# Wait first, then the same neighbour order as a_star
+MOVES = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+DIRECTION_OF = {(0, -1): 'UP', (0, 1): 'DOWN', (-1, 0): 'LEFT', (1, 0): 'RIGHT', (0, 0): 'STAY'}
+
+
+class ReservationTable:
+    """
+    Space-time cells (x, y, k) claimed by drones that already planned this
+    tick, k = ticks from now.
+
+    Within a tick drones move one at a time in id order, and drones plan in
+    the same order. A drone that plans (and moves) later must therefore not
+    be at cell c at time k when an earlier drone is at c at time k (vertex
+    conflict) or k + 1 (the earlier drone would move into c while it is still
+    there, which also rules out swaps). Every claim of (c, k) blocks both.
+    A drone that has not planned yet still sits on its current cell, so
+    earlier drones can't enter it on the first tick.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.cells = set()  # (x, y, k)
+        self.parked = {}    # (x, y) -> k from which the cell stays claimed
+        self.waiting = {}   # (x, y) -> ids of drones there that haven't planned yet
+
+    def begin_tick(self, drones):
+        self.cells.clear()
+        self.parked.clear()
+        self.waiting.clear()
+        for drone in drones:
+            self.waiting.setdefault(drone.pos, set()).add(drone.id)
+
+    def release(self, drone):
+        """
+        Called by a drone right before it plans.
+        """
+        ids = self.waiting.get(drone.pos)
+        if ids is not None:
+            ids.discard(drone.id)
+            if not ids:
+                del self.waiting[drone.pos]
+
+    def is_free(self, x, y, k):
+        if k == 1 and (x, y) in self.waiting:
+            return False
+        if (x, y, k) in self.cells:
+            return False
+        start = self.parked.get((x, y))
+        return start is None or k < start
+
+    def reserve_path(self, path):
+        """
+        Claim path[k] at time k; the last cell stays claimed after the path ends.
+        """
+        for k, (x, y) in enumerate(path):
+            self.cells.add((x, y, k))
+            if k > 0:
+                self.cells.add((x, y, k - 1))
+        last = path[-1]
+        self.parked[last] = min(self.parked.get(last, len(path)), len(path) - 2)
+
+
+@profiling.timed("space_time_search")
+def plan_window(start, grid, heuristic, table, window=WINDOW):
+    """
+    Windowed space-time A* from start towards the goal described by
+    heuristic (flat goal distance field, see GridPlanner.distance_field),
+    avoiding cells claimed in table. Waiting in place is a move of cost 1.
+
+    The search ends at the goal or at depth window, where the remaining cost
+    is taken from the heuristic. Returns the positions for k = 0..K (K <= window),
+    or None if the goal can't be reached from start.
+    """
+    height, width = grid.shape
+    cells = memoryview(np.ascontiguousarray(grid).reshape(-1))
+    h = memoryview(heuristic)
+
+    sx, sy = start
+    if h[sy * width + sx] < 0:
+        return None
+
+    tie = count()
+    start_node = (sx, sy, 0)
+    parent = {start_node: None}
+    g_score = {start_node: 0}
+    closed = set()
+    # Ties on f go to the deeper node so the search commits to progress
+    open_set = [(h[sy * width + sx], 0, next(tie), start_node)]
+
+    while open_set:
+        _, _, _, node = heapq.heappop(open_set)
+        if node in closed:
+            continue
+        closed.add(node)
+        x, y, k = node
+        if k == window or h[y * width + x] == 0:
+            path = []
+            while node is not None:
+                path.append(node[:2])
+                node = parent[node]
+            return path[::-1]
+
+        tentative_g = g_score[node] + 1
+        for dx, dy in MOVES:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            cell = ny * width + nx
+            tile = cells[cell]
+            if tile == 1 or tile == 3 or tile == 6:  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+                continue
+            remaining = h[cell]
+            if remaining < 0 or not table.is_free(nx, ny, k + 1):
+                continue
+            neighbor = (nx, ny, k + 1)
+            if neighbor in closed or tentative_g >= g_score.get(neighbor, tentative_g + 1):
+                continue
+            g_score[neighbor] = tentative_g
+            parent[neighbor] = node
+            heapq.heappush(open_set, (tentative_g + remaining, -(k + 1), next(tie), neighbor))
+
+    return None
+
+
+class CooperativePlanner:
+    """
+    Windowed cooperative A* (WHCA*) for the swarm: once per tick the active
+    drones plan in id order through a shared ReservationTable, so each path
+    avoids the ones planned before it. Only the first step of a plan is
+    executed; the window slides forward every tick.
+
+    Most of the time a drone's ordinary shortest path is conflict free and is
+    simply reserved. Only on a conflict is the space-time search run, with the
+    true distance to the goal over the known map as heuristic.
+    """
+
+    def __init__(self, height, width, window=WINDOW):
+        self.planner = GridPlanner(height, width)
+        self.table = ReservationTable(window)
+        self.window = window
+        self.fields = {}  # goal -> distance field, for the current tick
+        self.detours = 0  # space-time searches run
+
+    def begin_tick(self, drones):
+        self.table.begin_tick(drones)
+        self.fields.clear()
+
+    def plan(self, drone, goal, grid, path):
+        """
+        Reserve and return the drone's positions for k = 0..K (K >= 1) towards
+        goal, given its spatial shortest path (start exclusive), or None if
+        there is no conflict-free plan.
+        """
+        self.table.release(drone)
+        is_free = self.table.is_free
+
+        timed = [drone.pos]
+        for k, (x, y) in enumerate(path, start=1):
+            if k > self.window:
+                break
+            if not is_free(x, y, k):
+                timed = None
+                break
+            timed.append((x, y))
+
+        if timed is None or len(timed) < 2:
+            field = self.fields.get(goal)
+            if field is None:
+                field = self.planner.distance_field(goal, grid)
+                self.fields[goal] = field
+            self.detours += 1
+            timed = plan_window(drone.pos, grid, field, self.table, self.window)
+            if timed is None or len(timed) < 2:
+                return None
+
+        self.table.reserve_path(timed)
+        return timed
+
+    def wander(self, drone, env):
+        """
+        Random step for a drone without a goal (like MasterController.random_walk),
+        restricted to cells no other drone has claimed. Returns the direction.
+        """
+        self.table.release(drone)
+        x, y = drone.pos
+        for dx, dy in env.rng.sample(MOVES[1:], 4):
+            nx, ny = x + dx, y + dy
+            if not env.is_collision(nx, ny) and self.table.is_free(nx, ny, 1):
+                self.table.reserve_path([(x, y), (nx, ny)])
+                return DIRECTION_OF[(dx, dy)]
+
+        # All directions blocked or claimed — stay
+        self.table.reserve_path([(x, y)])
+        return 'STAY'
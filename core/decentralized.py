@@ -0,0 +1,481 @@
+import struct
+import time
+from collections import defaultdict
+import numpy as np
+from core import profiling
+from core.frontiers import FrontierIndex
+from core.policies import ExplorationPolicy, make_policy
+
+# Wire format (little endian). A data message is a sequence of update
+# records, each an UPDATE header followed by its payload:
+#     flat ids of the cells, sorted and run-length coded: run starts as
+#     gaps from the previous start, then run lengths, each array in the
+#     smallest unsigned type that fits (its itemsize is in the header);
+#     the tiles, 3 bits each, bit-packed.
+# A beacon is a BEACON header followed by entries of the sender's version
+# vector: their origins (uint16), then their versions (uint32). A request
+# is a REQUEST header followed by REQUEST_RANGEs.
+UPDATE = struct.Struct("<HIIIIBB")  # origin, version, tick, cells, runs, gap itemsize, length itemsize
+BEACON = struct.Struct("<HH")       # sender, entries
+REQUEST = struct.Struct("<HH")      # sender, ranges
+REQUEST_RANGE = struct.Struct("<HII")  # origin, first version, last version
+KIND_BEACON = b"B"
+KIND_DATA = b"D"
+KIND_REQUEST = b"R"
+KIND_NAMES = {KIND_BEACON: "beacon", KIND_DATA: "data", KIND_REQUEST: "request"}
+
+BEACON_INTERVAL = 4  # ticks between beacons of version vector changes
+
+_UINTS = {1: np.uint8, 2: np.uint16, 4: np.uint32}
+
+
+def _smallest_uint(values):
+    top = int(values.max()) if len(values) else 0
+    for size, dtype in _UINTS.items():
+        if top <= np.iinfo(dtype).max:
+            return size, values.astype(dtype)
+    raise ValueError(f"{top} does not fit in 32 bits")
+
+
+def encode_update(origin, version, tick, cells, vals):
+    """
+    One update record: the cells (flat ids y * width + x, unique) an agent
+    discovered, with their tiles (0..7).
+    """
+    order = np.argsort(cells, kind="stable")
+    cells = np.asarray(cells, dtype=np.int64)[order]
+    vals = np.asarray(vals, dtype=np.uint8)[order]
+    breaks = np.flatnonzero(np.diff(cells) != 1) + 1
+    if len(cells):
+        starts = cells[np.r_[0, breaks]]
+        lengths = np.diff(np.r_[0, breaks, len(cells)])
+    else:
+        starts = lengths = cells
+    gap_size, gaps = _smallest_uint(np.diff(starts, prepend=0))
+    length_size, lengths = _smallest_uint(lengths)
+    tiles = np.packbits(np.unpackbits(vals[:, None], axis=1)[:, 5:])
+    header = UPDATE.pack(origin, version, tick, len(cells), len(starts), gap_size, length_size)
+    return header + gaps.tobytes() + lengths.tobytes() + tiles.tobytes()
+
+
+def read_updates(data):
+    """
+    Yield (origin, version, tick, start, end) for every update record in a
+    data message, reading the headers only; data[start:end] is the record
+    (see decode_update).
+    """
+    offset = 0
+    while offset < len(data):
+        origin, version, tick, count, runs, gap_size, length_size = UPDATE.unpack_from(data, offset)
+        end = offset + UPDATE.size + runs * (gap_size + length_size) + (3 * count + 7) // 8
+        yield origin, version, tick, offset, end
+        offset = end
+
+
+def decode_update(record):
+    """
+    (cells, vals) of one update record: flat ids and tiles as arrays.
+    """
+    _, _, _, count, runs, gap_size, length_size = UPDATE.unpack_from(record)
+    offset = UPDATE.size
+    gaps = np.frombuffer(record, _UINTS[gap_size], runs, offset)
+    offset += runs * gap_size
+    lengths = np.frombuffer(record, _UINTS[length_size], runs, offset).astype(np.int64)
+    offset += runs * length_size
+    bits = np.unpackbits(np.frombuffer(record, np.uint8, (3 * count + 7) // 8, offset))
+
+    # Expand the runs: every cell is its run's start plus its index in the run
+    first = np.cumsum(gaps, dtype=np.int64) - np.cumsum(lengths) + lengths
+    cells = np.repeat(first, lengths) + np.arange(count)
+    vals = (bits[0:3 * count:3] << 2) | (bits[1:3 * count:3] << 1) | bits[2:3 * count:3]
+    return cells, vals.view(np.int8)
+
+
+class MessageBus:
+    """
+    In-process stand-in for the radio link. Every send is one transmission
+    of a byte message, heard by the given receivers (one for a reply, every
+    drone in range for a broadcast) latency ticks later, in sending order.
+    Nothing is lost. Counts what goes over the air: a broadcast costs its
+    bytes once. Messages sent during a tick are delivered at the start of
+    a later one, so latency is at least one tick.
+    """
+
+    def __init__(self, latency=1):
+        if latency < 1:
+            raise ValueError(f"latency must be at least one tick, got {latency}")
+        self.latency = latency
+        self.queue = defaultdict(list)  # delivery tick -> [(src, dst, message)]
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.bytes_by_kind = defaultdict(int)  # first byte of the message -> bytes
+
+    def send(self, tick, src, receivers, message):
+        due = self.queue[tick + self.latency]
+        for dst in receivers:
+            due.append((src, dst, message))
+        self.bytes_sent += len(message)
+        self.messages_sent += 1
+        self.bytes_by_kind[message[:1]] += len(message)
+        profiling.active.count("bytes_sent", len(message))
+
+    def deliver(self, tick):
+        return self.queue.pop(tick, [])
+
+
+class DroneAgent:
+    """
+    One drone on its own: it plans with its own policy instance on its own
+    map (drone.local_map) and frontier set, and learns the rest of the map
+    only from the updates other agents send it.
+
+    Synchronisation state: every agent numbers the updates it publishes
+    (one per tick with discoveries). versions[j] is how many of agent j's
+    updates this agent has applied (its version vector) and log[j] holds
+    their encoded records, so they can be passed on. peers[j] is agent j's
+    version vector as its beacons told it.
+
+    Beacons only carry what changed: every BEACON_INTERVAL ticks, the
+    entries that moved since the agent's last beacon (nothing if none
+    did); right away, every nonzero entry when a drone that did not hear
+    the previous beacons has come into range. Every update an agent
+    receives also tells it that the sender has that version.
+
+    An agent broadcasts its own updates as it publishes them. Everything
+    else is pulled: when a neighbour's beacon shows updates this agent
+    lacks, it requests them from one neighbour (the one furthest ahead),
+    so a drone that comes into range receives each missing update once
+    rather than once per neighbour. Updates that arrive ahead of a gap
+    wait in early until the gap is filled.
+
+    An agent provides the world interface policies expect (env,
+    global_map, frontiers, tick), see ExplorationPolicy.
+    """
+
+    def __init__(self, drone, env, discoverable_mask, mode):
+        self.drone = drone
+        self.env = env
+        self.global_map = drone.local_map
+        self.frontier_index = FrontierIndex(self.global_map, env.grid, discoverable_mask)
+        self.frontiers = self.frontier_index.frontiers
+        self.tick = 0
+
+        num_drones = len(env.drones)
+        self.versions = np.zeros(num_drones, dtype=np.int64)
+        self.requested = np.zeros(num_drones, dtype=np.int64)  # highest version asked for, per origin
+        self.log = [[] for _ in range(num_drones)]
+        self.early = [{} for _ in range(num_drones)]  # version -> record, per origin
+        self.peers = {}
+        self.beaconed = np.zeros(num_drones, dtype=np.int64)  # versions at the last beacon
+        self.listeners = set()  # drones in range of every beacon since they came into range
+        self.pending = []  # flat ids and tiles discovered since the last publish
+        self.outbox = []  # (receiver, message) replies to requests
+        self.received = []  # (xs, ys, vals) written to the map but not learned yet
+
+        self.policy = mode.__class__() if isinstance(mode, ExplorationPolicy) else make_policy(mode)
+        self.policy.setup(self)
+
+    def learn(self, xs, ys, vals):
+        """
+        Cells (arrays) that just became known in this agent's map.
+        """
+        self.policy.observe(xs, ys, vals)
+        self.frontier_index.update(zip(xs.tolist(), ys.tolist()))
+
+    def act(self, tick):
+        """
+        Plan and make this tick's move. Returns the (x, y, val) discoveries.
+        """
+        self.tick = tick
+        discovered = []
+        for drone, direction in self.policy.plan_all([self.drone], self):
+            if direction is None:
+                continue
+            new_info = drone.move(direction, self.env)
+            if new_info:
+                xs, ys, vals = np.array(new_info, dtype=np.int64).T
+                self.learn(xs, ys, vals)
+                self.pending.append((ys * self.env.width + xs, vals))
+                discovered.extend(new_info)
+        return discovered
+
+    def publish(self, tick):
+        """
+        Turn the discoveries since the last call into a new update of its
+        own. Returns the data message to broadcast, or None.
+        """
+        if not self.pending:
+            return None
+        cells = np.concatenate([c for c, _ in self.pending])
+        vals = np.concatenate([v for _, v in self.pending])
+        self.pending = []
+        me = self.drone.id
+        record = encode_update(me, int(self.versions[me]) + 1, tick, cells, vals)
+        self.log[me].append(record)
+        self.versions[me] += 1
+        return KIND_DATA + record
+
+    def beacon(self, receivers, tick):
+        """
+        Beacon for the drones now in range, or None when none is due.
+        """
+        if not all(peer in self.listeners for peer in receivers):
+            changed = np.flatnonzero(self.versions)
+        elif tick % BEACON_INTERVAL == 0:
+            changed = np.flatnonzero(self.versions != self.beaconed)
+        else:
+            self.listeners = set(receivers)
+            return None
+        self.listeners = set(receivers)
+        self.beaconed = self.versions.copy()
+        if not len(changed):
+            return None
+        return (KIND_BEACON + BEACON.pack(self.drone.id, len(changed)) + changed.astype(np.uint16).tobytes()
+                + self.versions[changed].astype(np.uint32).tobytes())
+
+    def requests(self, neighbours):
+        """
+        Yield (neighbour, request message) for the updates the neighbours'
+        beacons show this agent lacks and has not asked for yet, each asked
+        from the neighbour that is furthest ahead on its origin.
+        """
+        known = [(peer, self.peers[peer]) for peer in neighbours if peer in self.peers]
+        if not known:
+            return
+        ahead = np.array([versions for _, versions in known])
+        best = ahead.argmax(axis=0)
+        latest = ahead[best, np.arange(len(self.versions))]
+        have = np.maximum(self.versions, self.requested)
+        wanted = defaultdict(list)
+        for origin in np.flatnonzero(latest > have).tolist():
+            upto = int(latest[origin])
+            wanted[known[best[origin]][0]].append(REQUEST_RANGE.pack(origin, int(have[origin]) + 1, upto))
+            self.requested[origin] = upto
+        for peer, ranges in wanted.items():
+            yield peer, KIND_REQUEST + REQUEST.pack(self.drone.id, len(ranges)) + b"".join(ranges)
+
+    def _apply(self, record, tick):
+        origin, version, published = UPDATE.unpack_from(record)[:3]
+        self.versions[origin] = version
+        self.log[origin].append(record)
+        self.early[origin].pop(version, None)
+        cells, vals = decode_update(record)
+        width = self.env.width
+        ys, xs = cells // width, cells % width
+        unknown = self.global_map[ys, xs] == -1
+        xs, ys, vals = xs[unknown], ys[unknown], vals[unknown]
+        self.global_map[ys, xs] = vals
+        if len(xs):
+            self.received.append((xs, ys, vals))
+        return tick - published
+
+    def integrate(self):
+        """
+        Learn the cells received since the last call, in one batch.
+        """
+        if self.received:
+            xs, ys, vals = (np.concatenate(parts) for parts in zip(*self.received))
+            self.received = []
+            self.learn(xs, ys, vals)
+
+    def receive(self, src, message, tick):
+        """
+        Handle a message from agent src. Returns the ages (ticks since
+        publication) of the updates it applied; replies go to outbox and
+        the new cells into the map, to be learned by integrate().
+        """
+        kind, body = message[:1], message[1:]
+        if kind == KIND_BEACON:
+            sender, count = BEACON.unpack_from(body)
+            origins = np.frombuffer(body, np.uint16, count, BEACON.size)
+            versions = np.frombuffer(body, np.uint32, count, BEACON.size + 2 * count)
+            known = self.peers.get(sender)
+            if known is None:
+                known = self.peers[sender] = np.zeros(len(self.versions), dtype=np.int64)
+            known[origins] = np.maximum(known[origins], versions)
+            return []
+
+        if kind == KIND_REQUEST:
+            sender, count = REQUEST.unpack_from(body)
+            records = []
+            for i in range(count):
+                origin, first, last = REQUEST_RANGE.unpack_from(body, REQUEST.size + i * REQUEST_RANGE.size)
+                records.extend(self.log[origin][first - 1:last])
+            if records:
+                self.outbox.append((sender, KIND_DATA + b"".join(records)))
+            return []
+
+        ages = []
+        known = self.peers.get(src)
+        for origin, version, _, start, end in read_updates(body):
+            if known is not None and version > known[origin]:
+                known[origin] = version  # src has it, as good as a beacon entry
+            # Only the header is read for updates this agent already has
+            applied = self.versions[origin]
+            if version <= applied:
+                continue
+            if version > applied + 1:
+                self.early[origin][version] = body[start:end]
+                continue
+            ages.append(self._apply(body[start:end], tick))
+            early = self.early[origin]
+            while early:
+                record = early.pop(int(self.versions[origin]) + 1, None)
+                if record is None:
+                    break
+                ages.append(self._apply(record, tick))
+        return ages
+
+
+class DecentralizedController:
+    """
+    Runs the swarm as independent DroneAgents that only share map knowledge
+    through a MessageBus, as a drop-in for MasterController (step, coverage,
+    coverage_history, global_map).
+
+    Every tick: deliver the messages due (agents answer requests right
+    away); every active agent plans and moves on its own map; agents
+    broadcast their new discoveries and their version vector changes
+    to the active agents within comm_range cells (Euclidean, None =
+    unlimited), then request what those beacons show they lack. Updates
+    spread hop by hop, so knowledge also reaches drones out of direct
+    range.
+
+    Agents step one after another in one process, in lockstep ticks, like
+    the centralized controller: moves still resolve collisions against the
+    shared environment, and runs stay deterministic. All knowledge still
+    crosses the bus as encoded bytes, so bytes and encode/decode cost are
+    those of a real link.
+
+    global_map is the union of what the agents discovered themselves, for
+    coverage and rendering; no agent reads it. comm_history holds per-tick
+    link metrics (see comm_summary).
+    """
+
+    def __init__(self, env, discoverable_mask, mode="frontier", comm_range=None, latency=1):
+        if env.shared_map is not None:
+            raise ValueError("decentralized agents need their own maps, run without shared_map")
+        self.env = env
+        self.mode = mode if isinstance(mode, str) else mode.name
+        self.comm_range = comm_range
+        self.bus = MessageBus(latency)
+        self.agents = [DroneAgent(drone, env, discoverable_mask, mode) for drone in env.drones]
+        self.global_map = np.full((env.height, env.width), -1, dtype=np.int8)
+        self.discoverable_mask = discoverable_mask
+        self.tick = 0
+
+        self.known_reachable = 0
+        self.total_reachable = int(np.count_nonzero(discoverable_mask))
+        self.coverage_history = []
+        self.recorder = None  # optional TraceRecorder (see core.trace)
+        self.comm_history = []  # per tick: bytes, messages, updates, mean and max latency, sync_time
+
+    @property
+    def coverage(self):
+        if self.total_reachable == 0:
+            return 1.0
+        return min(self.known_reachable / self.total_reachable, 1.0)
+
+    def _neighbours(self):
+        """
+        Active agent id -> ids of the active agents within range.
+        """
+        ids = np.flatnonzero([d.active for d in self.env.drones])
+        linked = ~np.eye(len(ids), dtype=bool)
+        if self.comm_range is not None and len(ids) > 1:
+            pos = self.env.positions[ids].astype(np.int64)
+            d2 = ((pos[:, None, :] - pos[None, :, :]) ** 2).sum(axis=2)
+            linked &= d2 <= self.comm_range ** 2
+        return {int(i): ids[row].tolist() for i, row in zip(ids, linked)}
+
+    def step(self, current_time):
+        for drone in self.env.drones:
+            if not drone.active:
+                drone.activate(current_time)
+        self.tick = current_time
+        profiler = profiling.active
+        bus = self.bus
+        bytes_before, messages_before = bus.bytes_sent, bus.messages_sent
+
+        sync_start = time.perf_counter()
+        ages = []
+        with profiler.phase("sync"):
+            for src, dst, message in bus.deliver(current_time):
+                agent = self.agents[dst]
+                ages.extend(agent.receive(src, message, current_time))
+                for receiver, reply in agent.outbox:
+                    bus.send(current_time, dst, [receiver], reply)
+                agent.outbox = []
+            for agent in self.agents:
+                agent.integrate()
+        sync_time = time.perf_counter() - sync_start
+
+        with profiler.phase("plan"):
+            for agent in self.agents:
+                if agent.drone.active:
+                    discovered = agent.act(current_time)
+                    if discovered:
+                        self._merge(discovered)
+
+        sync_start = time.perf_counter()
+        with profiler.phase("sync"):
+            neighbours = self._neighbours()
+            for src, receivers in neighbours.items():
+                agent = self.agents[src]
+                update = agent.publish(current_time)
+                beacon = agent.beacon(receivers, current_time)
+                if receivers:
+                    if update is not None:
+                        bus.send(current_time, src, receivers, update)
+                    if beacon is not None:
+                        bus.send(current_time, src, receivers, beacon)
+            for src, receivers in neighbours.items():
+                for peer, request in self.agents[src].requests(receivers):
+                    bus.send(current_time, src, [peer], request)
+        sync_time += time.perf_counter() - sync_start
+
+        self.comm_history.append({
+            "tick": current_time,
+            "bytes": bus.bytes_sent - bytes_before,
+            "messages": bus.messages_sent - messages_before,
+            "links": sum(len(receivers) for receivers in neighbours.values()),
+            "updates": len(ages),
+            "mean_latency": float(np.mean(ages)) if ages else None,
+            "max_latency": max(ages) if ages else None,
+            "sync_time": sync_time,
+        })
+        self.coverage_history.append((current_time, self.coverage))
+        if self.recorder is not None:
+            self.recorder.end_tick(self.coverage)
+
+    def _merge(self, new_info):
+        xs, ys, vals = np.array(new_info, dtype=np.int64).T
+        unknown = self.global_map[ys, xs] == -1
+        xs, ys, vals = xs[unknown], ys[unknown], vals[unknown]
+        self.global_map[ys, xs] = vals
+        if self.recorder is not None:
+            self.recorder.discovered(xs, ys, vals)
+        self.known_reachable += int(np.count_nonzero(self.discoverable_mask[ys, xs]))
+
+    def comm_summary(self):
+        """
+        Totals over the run: bytes sent (also per message kind) and
+        transmissions, bytes per tick, update latency in ticks (mean and max
+        over all applied updates) and the seconds spent encoding, sending
+        and decoding.
+        """
+        history = self.comm_history
+        ticks = max(len(history), 1)
+        total_bytes = sum(h["bytes"] for h in history)
+        updates = sum(h["updates"] for h in history)
+        latency = sum(h["mean_latency"] * h["updates"] for h in history if h["updates"])
+        return {
+            "bytes": total_bytes,
+            "messages": sum(h["messages"] for h in history),
+            "bytes_per_tick": total_bytes / ticks,
+            **{f"{name}_bytes": self.bus.bytes_by_kind[kind] for kind, name in KIND_NAMES.items()},
+            "updates": updates,
+            "mean_latency": latency / updates if updates else None,
+            "max_latency": max((h["max_latency"] for h in history if h["updates"]), default=None),
+            "sync_time": sum(h["sync_time"] for h in history),
+        }
@@ -0,0 +1,159 @@
+import heapq
+import numpy as np
+from core import profiling
+
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    D* Lite (Koenig & Likhachev) on the 4-connected grid, for one drone and
+    one goal.
+
+    The search runs backwards from the goal, so the drone can move and the
+    map can change without starting over: move_to() shifts the start and
+    update_cells() repairs only the vertices whose costs changed. Passability
+    is read from grid on every lookup (tile values, -1 = unknown and passable,
+    same as a_star), so the caller only has to report which cells became
+    blocking.
+
+    g and rhs are dicts (missing = infinity): only the region the search has
+    touched costs memory, however large the map is.
+    """
+
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.height, self.width = grid.shape
+        # Live view of grid: it is written in place as the map grows
+        self.cells = memoryview(grid.reshape(-1)) if isinstance(grid, np.ndarray) else grid.flat
+        self.goal = self._id(goal)
+        self.start = self._id(start)
+        self.last = self.start
+        self.km = 0
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.open = {}   # vertex -> key currently in the heap
+        self.heap = []
+        self.expanded = 0  # vertices expanded over the lifetime of the search
+        self._push(self.goal)
+
+    # Vertices are flat cell ids y * width + x
+
+    def _id(self, pos):
+        return pos[1] * self.width + pos[0]
+
+    def _h(self, a, b):
+        width = self.width
+        return abs(a % width - b % width) + abs(a // width - b // width)
+
+    def _key(self, u):
+        m = min(self.g.get(u, INF), self.rhs.get(u, INF))
+        return (m + self._h(self.start, u) + self.km, m)
+
+    def _push(self, u):
+        key = self._key(u)
+        self.open[u] = key
+        heapq.heappush(self.heap, (key, u))
+
+    def _passable(self, u):
+        tile = self.cells[u]
+        return not (tile == 1 or tile == 3 or tile == 6)  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+
+    def _neighbours(self, u):
+        width = self.width
+        x = u % width
+        if x > 0:
+            yield u - 1
+        if x < width - 1:
+            yield u + 1
+        if u >= width:
+            yield u - width
+        if u < (self.height - 1) * width:
+            yield u + width
+
+    def _update_vertex(self, u):
+        if u != self.goal:
+            best = INF
+            if self._passable(u):
+                g = self.g
+                for v in self._neighbours(u):
+                    gv = g.get(v, INF)
+                    if gv + 1 < best and self._passable(v):
+                        best = gv + 1
+            self.rhs[u] = best
+        self.open.pop(u, None)  # heap entry goes stale
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            self._push(u)
+
+    def _top_key(self):
+        heap, open_ = self.heap, self.open
+        while heap and open_.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else (INF, INF)
+
+    def compute(self):
+        """
+        Bring g up to date for the current start.
+        """
+        g, rhs, start = self.g, self.rhs, self.start
+        expanded = self.expanded
+        while True:
+            top = self._top_key()
+            if not (top < self._key(start) or rhs.get(start, INF) != g.get(start, INF)):
+                break
+            if top == (INF, INF):
+                break  # start unreachable
+            k_old, u = heapq.heappop(self.heap)
+            del self.open[u]
+            self.expanded += 1
+
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u)
+            elif g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+                for v in self._neighbours(u):
+                    self._update_vertex(v)
+            else:
+                g[u] = INF
+                self._update_vertex(u)
+                for v in self._neighbours(u):
+                    self._update_vertex(v)
+        profiling.active.count("dstar_expansions", self.expanded - expanded)
+
+    def move_to(self, pos):
+        u = self._id(pos)
+        if u != self.start:
+            self.start = u
+            self.km += self._h(self.last, u)
+            self.last = u
+
+    def update_cells(self, cells):
+        """
+        Repair the search after cells (iterable of (x, y)) became blocking.
+        """
+        for pos in cells:
+            u = self._id(pos)
+            self._update_vertex(u)
+            for v in self._neighbours(u):
+                self._update_vertex(v)
+
+    @property
+    def reachable(self):
+        return self.rhs.get(self.start, INF) < INF
+
+    def next_step(self):
+        """
+        Next (x, y) on a shortest path from start, or None if the goal is
+        unreachable (or start is the goal).
+        """
+        if self.start == self.goal or not self.reachable:
+            return None
+        best, best_cost = None, INF
+        for v in self._neighbours(self.start):
+            cost = self.g.get(v, INF) + 1
+            if cost < best_cost and self._passable(v):
+                best, best_cost = v, cost
+        if best is None:
+            return None
+        return best % self.width, best // self.width
@@ -0,0 +1,298 @@
+import csv
+import hashlib
+import logging
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core import profiling
+from core.renderer import default_video_path
+from core.results_store import ResultsStore
+from core.sim_runner import run_headless, MAX_TICKS
+
+RESULT_FIELDS = ["map", "drones", "policy", "iteration", "seed", "ticks", "wall_time", "status"]
+DEFAULT_POLICY = "frontier"  # assumed for rows of results files written before the policy column
+
+
+def job_seed(map_idx, num_drones, iteration, base_seed=0):
+    """
+    Deterministic 32-bit seed for one run of a sweep. It doesn't depend on
+    the policy, so every policy is benchmarked on the same entry points.
+    """
+    key = f"{base_seed}:{map_idx}:{num_drones}:{iteration}".encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:4], "little")
+
+
+def run_job(job):
+    """
+    Run one headless simulation. Executed in a worker process.
+    Returns (row, error, coverage): error is None or the exception text,
+    coverage the run's per-tick coverage (float32 array, None on error).
+    """
+    row = {
+        "map": job["map"],
+        "drones": job["drones"],
+        "policy": job["policy"],
+        "iteration": job["iteration"],
+        "seed": job["seed"],
+        "ticks": None,
+        "wall_time": None,
+        "status": "not solved",
+    }
+    name = f"map{job['map']}_drones{job['drones']}_{job['policy']}_{job['iteration']}"
+    try:
+        result = run_headless(
+            map_path=job["map_path"],
+            num_drones=job["drones"],
+            num_entry_points=1,
+            fov=job["fov"],
+            max_ticks=job["max_ticks"],
+            seed=job["seed"],
+            policy=job["policy"],
+            profile=job.get("profile_dir") is not None,
+            video_path=(default_video_path(os.path.join(job["video_dir"], name))
+                        if job.get("video_dir") is not None else None),
+            video_every=job.get("video_every", 1),
+            record_path=(os.path.join(job["trace_dir"], name + ".npz")
+                         if job.get("trace_dir") is not None else None),
+        )
+    except Exception as e:
+        row["status"] = "error"
+        return row, f"{type(e).__name__}: {e}", None
+
+    if job.get("profile_dir") is not None:
+        profiling.export(os.path.join(job["profile_dir"], name + ".json"), result["profile"],
+                         map=job["map"], drones=job["drones"], policy=job["policy"], iteration=job["iteration"],
+                         seed=job["seed"], ticks_run=result["ticks_run"], wall_time=result["wall_time"])
+
+    coverage = np.array([c for _, c in result["coverage"]], dtype=np.float32)
+    row["wall_time"] = round(result["wall_time"], 6)
+    row["ticks_run"] = result["ticks_run"]
+    row["final_coverage"] = float(coverage[-1]) if len(coverage) else 0.0
+    if result["completed"]:
+        row["ticks"] = result["ticks"]
+        row["status"] = "solved"
+    return row, None, coverage
+
+
+def _row_key(row):
+    """
+    Key (map, drones, policy, iteration) of a results row, None if malformed.
+    """
+    try:
+        return int(row["map"]), int(row["drones"]), row.get("policy") or DEFAULT_POLICY, int(row["iteration"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def load_completed(results_path):
+    """
+    Keys (map, drones, policy, iteration) of runs already present in a results
+    file. Runs that ended in an error don't count, so they are retried, and
+    malformed rows (e.g. a line cut off when a sweep was killed) are skipped.
+    """
+    if not os.path.exists(results_path):
+        return set()
+    done = set()
+    with open(results_path, newline="") as f:
+        for r in csv.DictReader(f):
+            if r.get("status") not in ("solved", "not solved"):
+                continue  # an error, to be retried, or a cut-off line
+            key = _row_key(r)
+            if key is not None:
+                done.add(key)
+    return done
+
+
+def _rewrite(results_path, rows):
+    tmp = results_path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            row.setdefault("policy", DEFAULT_POLICY)
+            writer.writerow(row)
+    os.replace(tmp, results_path)
+
+
+def upgrade_results(results_path):
+    """
+    Rewrite a results file written with an older column set (e.g. before
+    the policy column) under RESULT_FIELDS, so new rows can be appended.
+    """
+    if not os.path.exists(results_path) or os.path.getsize(results_path) == 0:
+        return
+    with open(results_path, newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames == RESULT_FIELDS:
+            return
+        rows = list(reader)
+    _rewrite(results_path, rows)
+
+
+class CsvResults:
+    """
+    Flat CSV results file (RESULT_FIELDS, no coverage series), the format of
+    sweeps before ResultsStore; same interface as ResultsStore. A retried run
+    replaces its error row, so every run has one row.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.errors = None  # keys of the error rows in the file
+
+    def completed(self):
+        return load_completed(self.path)
+
+    def _drop(self, key):
+        """
+        Remove the error rows of key from the file (rare: only retries).
+        """
+        self.close()
+        self.file = None
+        with open(self.path, newline="") as f:
+            rows = [r for r in csv.DictReader(f) if _row_key(r) != key]
+        _rewrite(self.path, rows)
+        self.errors.discard(key)
+
+    def append(self, row, coverage=None):
+        if self.errors is None:
+            self.errors = set()
+            if os.path.exists(self.path):
+                upgrade_results(self.path)
+                with open(self.path, newline="") as f:
+                    self.errors = {_row_key(r) for r in csv.DictReader(f) if r.get("status") == "error"}
+        key = _row_key(row)
+        if key in self.errors:
+            self._drop(key)
+        if self.file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            if not write_header:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    cut_off = f.read(1) != b"\n"
+            self.file = open(self.path, "a", newline="")
+            if not write_header and cut_off:
+                self.file.write("\n")  # keep a cut-off last line apart from the new rows
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            if write_header:
+                self.writer.writeheader()
+        self.writer.writerow(row)
+        self.file.flush()
+        if row.get("status") == "error":
+            self.errors.add(key)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def open_results(results_path):
+    """
+    A .csv path is a CsvResults file, anything else a ResultsStore directory
+    (see core.results_store).
+    """
+    if results_path.endswith(".csv"):
+        return CsvResults(results_path)
+    return ResultsStore(results_path)
+
+
+def build_jobs(map_paths, drone_counts, iterations, fov=1, max_ticks=MAX_TICKS, base_seed=0,
+               policies=(DEFAULT_POLICY,)):
+    """
+    map_paths: dict of map index -> map file path.
+    policies: names of registered exploration policies to compare.
+    """
+    return [
+        {
+            "map": map_idx,
+            "map_path": map_path,
+            "drones": num_drones,
+            "policy": policy,
+            "iteration": iteration,
+            "seed": job_seed(map_idx, num_drones, iteration, base_seed),
+            "fov": fov,
+            "max_ticks": max_ticks,
+        }
+        for map_idx, map_path in map_paths.items()
+        for num_drones in drone_counts
+        for policy in policies
+        for iteration in range(1, iterations + 1)
+    ]
+
+
+def profile_dir(results_path):
+    """
+    Directory next to a results file that holds its per-run profiles.
+    """
+    return os.path.splitext(results_path)[0] + "_profiles"
+
+
+def video_dir(results_path):
+    """
+    Directory next to a results file that holds its per-run videos.
+    """
+    return os.path.splitext(results_path)[0] + "_videos"
+
+
+def trace_dir(results_path):
+    """
+    Directory next to a results file that holds its per-run traces.
+    """
+    return os.path.splitext(results_path)[0] + "_traces"
+
+
+def run_sweep(map_paths, drone_counts, iterations, results_path, workers=None, fov=1,
+              max_ticks=MAX_TICKS, base_seed=0, on_result=None, policies=(DEFAULT_POLICY,), profile=False,
+              video=False, video_every=1, record=False):
+    """
+    Run every (map, drone count, policy, iteration) job on a process pool and append
+    one row per finished job to results_path as it completes: a ResultsStore
+    directory, which also keeps each run's coverage series, or a flat CSV
+    file for a .csv path (see open_results). Jobs that already have a row in
+    results_path are skipped, so an interrupted sweep can simply be restarted;
+    jobs that ended in an error are run again.
+
+    on_result(row) is called in the parent process after each row is appended.
+    With profile=True every run also writes its per-phase profile (see
+    core.profiling) as JSON into profile_dir(results_path). With video=True
+    every run is rendered offscreen (every video_every-th tick) into
+    video_dir(results_path): an .mp4 per run if imageio is installed, a
+    directory of PNG frames otherwise. With record=True every run writes a
+    trace (see core.trace) into trace_dir(results_path), to be replayed or
+    re-rendered later without simulating.
+    Returns the number of jobs run.
+    """
+    results = open_results(results_path)
+    done = results.completed()
+    jobs = [job for job in build_jobs(map_paths, drone_counts, iterations, fov, max_ticks, base_seed, policies)
+            if (job["map"], job["drones"], job["policy"], job["iteration"]) not in done]
+    if not jobs:
+        return 0
+    if profile:
+        for job in jobs:
+            job["profile_dir"] = profile_dir(results_path)
+    if video:
+        for job in jobs:
+            job["video_dir"] = video_dir(results_path)
+            job["video_every"] = video_every
+    if record:
+        for job in jobs:
+            job["trace_dir"] = trace_dir(results_path)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                row, error, coverage = future.result()
+                if error is not None:
+                    logging.warning(f"Map: {row['map']} | Iteration: {row['iteration']} | "
+                                    f"Drones: {row['drones']} | Policy: {row['policy']} | Error: {error}")
+                results.append(row, coverage)
+                if on_result is not None:
+                    on_result(row)
+    finally:
+        results.close()
+
+    return len(jobs)
@@ -0,0 +1,126 @@
+import numpy as np
+from core import profiling
+from core.chunked import ChunkedGrid
+from core.grid_utils import dilate, NEIGHBOURS
+
+# WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+BLOCKING_TILES = (1, 3, 6)
+
+
+class FrontierIndex:
+    """
+    Set of frontier cells kept in sync with a growing global map.
+
+    A frontier is a known, passable cell with at least one unknown,
+    discoverable 4-neighbour. Whether a cell is a frontier only depends on
+    itself and its 4-neighbours, so after a batch of discoveries only those
+    cells have to be re-checked.
+    """
+
+    def __init__(self, global_map, grid, discoverable_mask):
+        self.global_map = global_map
+        self.grid = grid
+        self.discoverable_mask = discoverable_mask
+        self.height, self.width = global_map.shape
+        self.frontiers = set()
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Full rescan of the map (vectorized). A ChunkedGrid map is rescanned
+        from its known cells instead, which stays proportional to the
+        explored area.
+        """
+        if isinstance(self.global_map, ChunkedGrid):
+            ys, xs = self.global_map.nonfill()
+            self.frontiers.clear()
+            self.update(zip(xs.tolist(), ys.tolist()))
+            return
+
+        unknown = (self.global_map == -1) & self.discoverable_mask
+        candidates = (self.global_map != -1) & ~np.isin(self.grid, BLOCKING_TILES)
+        ys, xs = np.nonzero(candidates & dilate(unknown))
+
+        self.frontiers.clear()
+        self.frontiers.update(zip(xs.tolist(), ys.tolist()))
+
+    def update(self, changed):
+        """
+        Re-check the cells in changed (iterable of (x, y)) and their 4-neighbours.
+        """
+        to_check = set()
+        for x, y in changed:
+            to_check.add((x, y))
+            for dx, dy in NEIGHBOURS:
+                to_check.add((x + dx, y + dy))
+        profiling.active.count("frontier_checks", len(to_check))
+
+        for x, y in to_check:
+            if self.is_frontier(x, y):
+                self.frontiers.add((x, y))
+            else:
+                self.frontiers.discard((x, y))
+
+    def is_frontier(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        if self.global_map[y, x] == -1:
+            return False
+        if self.grid[y, x] in BLOCKING_TILES:
+            return False
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                if self.global_map[ny, nx] == -1 and self.discoverable_mask[ny, nx]:
+                    return True
+        return False
+
+
+class FrontierCluster:
+    """
+    Connected (8-neighbour) group of frontier cells.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.size = len(cells)
+
+    @property
+    def centroid(self):
+        xs, ys = zip(*self.cells)
+        return (sum(xs) / self.size, sum(ys) / self.size)
+
+
+# 8-neighbours in the order the breadth-first split in cluster_frontiers visits them
+_NEIGHBOURS_8 = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+def cluster_frontiers(frontiers, max_size=None):
+    """
+    Split a set of frontier cells (x, y) into FrontierClusters of connected
+    cells. With max_size, larger components (the whole boundary of the
+    explored area is often one) are cut into pieces of at most max_size
+    cells in breadth-first order, so each piece stays compact.
+    """
+    remaining = set(frontiers)
+    take = remaining.remove
+    clusters = []
+    for seed in sorted(remaining):  # deterministic split points
+        if seed not in remaining:
+            continue
+        take(seed)
+        cells = []
+        queue = [seed]
+        for x, y in queue:  # the list grows as it is iterated, in breadth-first order
+            cells.append((x, y))
+            if len(cells) == max_size:
+                clusters.append(FrontierCluster(cells))
+                cells = []
+            for dx, dy in _NEIGHBOURS_8:
+                cell = (x + dx, y + dy)
+                if cell in remaining:
+                    take(cell)
+                    queue.append(cell)
+        if cells:
+            clusters.append(FrontierCluster(cells))
+    return clusters
@@ -1,6 +1,9 @@
 import numpy as np
 import random
 from agents.drone import Drone
+from agents.visibility import VisibilityCache
+from core.map_cache import load_map_assets
+from core.chunked import ChunkedGrid, make_grid
 
 # Map tile definitions
 FREE_SPACE = 0
@@ -11,6 +14,9 @@ DOOR_OPEN = 4
 WINDOW = 5
 OUT_OF_BOUNDS = 6
 
+WALKABLE_TILES = [FREE_SPACE, DOOR_OPEN, WINDOW]  # where a missing entry point may be placed
+ENTRY_SCAN_ROWS = 1024
+
 TILE_NAME = {
     FREE_SPACE: "Free",
     WALL: "Wall",
@@ -23,11 +29,22 @@ TILE_NAME = {
 
 
 class GridMapEnv:
-    def __init__(self, width=32, height=32, randomize=False, map_path=None, num_entry_points=2, num_drones=3, fov=0):
+    def __init__(self, width=32, height=32, randomize=False, map_path=None, num_entry_points=2, num_drones=3, fov=0,
+                 shared_map=False, history_len=None, chunk_size=None, rng=None):
+        """
+        rng: random.Random for everything random in the run (None = the global random module).
+        chunk_size: keep the per-cell arrays as ChunkedGrids of chunk_size x chunk_size
+        chunks, for very large maps; only the hierarchical policy plans within chunks.
+        """
+        self.chunk_size = chunk_size
+        self.rng = rng if rng is not None else random
+        self.map_assets = None  # cached preprocessing for maps loaded from a file
         if map_path:
-            self.grid = self.load_map(map_path)
+            self.map_assets = load_map_assets(map_path)
+            self.grid = self.map_assets.grid  # read-only, copied on first write
         elif randomize:
-            self.grid = self.generate_random_map(width, height, num_entry_points)
+            # Seeded from rng so a seeded run reproduces its map
+            self.grid = self.generate_random_map(width, height, num_entry_points, rng=self.rng.getrandbits(64))
         else:
             self.grid = np.zeros((height, width), dtype=np.int8)
 
@@ -35,27 +52,54 @@ class GridMapEnv:
         self.entry_points = self.find_entry_points()
         # print(self.height, self.width, self.entry_points)
 
+        # Static obstacles, and live drone counts per cell so collision and
+        # blocking queries don't have to scan the swarm
+        if chunk_size:
+            self.blocked = ChunkedGrid(self.grid.shape, False, bool, chunk_size,
+                                       init=lambda y0, y1, x0, x1: np.isin(self.grid[y0:y1, x0:x1],
+                                                                           [WALL, DOOR_CLOSED, OUT_OF_BOUNDS]))
+        else:
+            self.blocked = np.isin(self.grid, [WALL, DOOR_CLOSED, OUT_OF_BOUNDS])
+        self.occupancy = make_grid(self.grid.shape, 0, np.int16, chunk_size)  # active drones
+        self.presence = make_grid(self.grid.shape, 0, np.int16, chunk_size)   # all drones, active or not
+        self.visibility = VisibilityCache(self.grid)  # sensor sweeps shared by all drones
+
+        # shared_map: one observation map (and swept set) for the whole swarm
+        # instead of a full int8 map per drone
+        self.shared_map = make_grid(self.grid.shape, -1, np.int8, chunk_size) if shared_map else None
+        self.shared_swept = set() if shared_map else None
+
         self.drones = []
         for i in range(num_drones):
             y, x = self.entry_points[i % len(self.entry_points)]
             entry_time = i * 2
-            drone = Drone(drone_id=i, start_pos=(x, y), fov_radius=fov, entry_time=entry_time)
-            drone.initialize_map(self.grid.shape)
+            drone = Drone(drone_id=i, start_pos=(x, y), fov_radius=fov, entry_time=entry_time,
+                          history_len=history_len)
+            drone.initialize_map(self.grid.shape, self.shared_map, self.shared_swept, chunk_size)
+            drone.env = self
             self.drones.append(drone)
+            self.presence[y, x] += 1
+        # Drone positions as an (N, 2) array of (x, y), in the order of drones;
+        # drone_index maps a drone id to its row
+        self.positions = np.array([d.pos for d in self.drones], dtype=np.int32).reshape(-1, 2)
+        self.drone_index = {d.id: i for i, d in enumerate(self.drones)}
 
 
     @staticmethod
     def load_map(path):
         """
-        Loads a map from a .txt file with numeric values
+        Loads a map from a .txt file with numeric values (parsed once per file content)
         """
-        return np.loadtxt(path, dtype=np.int8)
+        return np.array(load_map_assets(path).grid)
 
     @staticmethod
-    def generate_random_map(width, height, num_entry_points=2):
+    def generate_random_map(width, height, num_entry_points=2, rng=None):
         """
         Generates a random map with guaranteed entry points and includes all tile types.
+        rng: numpy Generator or seed (None = fresh entropy). Tile placements are
+        sampled in batches.
         """
+        rng = np.random.default_rng(rng)
         grid = np.zeros((height, width), dtype=np.int8)
 
         # Border walls
@@ -64,75 +108,68 @@ class GridMapEnv:
         grid[:, 0] = WALL
         grid[:, -1] = WALL
 
+        def sample_cells(count):
+            return rng.integers(1, height - 1, count), rng.integers(1, width - 1, count)
+
         # Random internal walls
-        for _ in range(int(width * height * 0.1)):
-            x = random.randint(1, width - 2)
-            y = random.randint(1, height - 2)
-            grid[y, x] = WALL
-
-        # Random closed doors
-        for _ in range(int(width * height * 0.01)):
-            x = random.randint(1, width - 2)
-            y = random.randint(1, height - 2)
-            if grid[y, x] == FREE_SPACE:
-                grid[y, x] = DOOR_CLOSED
-
-        # Random open doors
-        for _ in range(int(width * height * 0.01)):
-            x = random.randint(1, width - 2)
-            y = random.randint(1, height - 2)
-            if grid[y, x] == FREE_SPACE:
-                grid[y, x] = DOOR_OPEN
-
-        # Random windows
-        for _ in range(int(width * height * 0.01)):
-            x = random.randint(1, width - 2)
-            y = random.randint(1, height - 2)
-            if grid[y, x] == FREE_SPACE:
-                grid[y, x] = WINDOW
-
-        # Random out-of-bounds areas (blackout zones)
-        for _ in range(int(width * height * 0.005)):
-            x = random.randint(1, width - 2)
-            y = random.randint(1, height - 2)
-            if grid[y, x] == FREE_SPACE:
-                grid[y, x] = OUT_OF_BOUNDS
-
-        # Force entry points on borders
-        entries = set()
-        attempts = 0
+        ys, xs = sample_cells(int(width * height * 0.1))
+        grid[ys, xs] = WALL
+
+        # Closed doors, open doors, windows and out-of-bounds areas (blackout zones),
+        # each only placed on cells that are still free
+        for tile, density in [(DOOR_CLOSED, 0.01), (DOOR_OPEN, 0.01), (WINDOW, 0.01), (OUT_OF_BOUNDS, 0.005)]:
+            ys, xs = sample_cells(int(width * height * density))
+            free = grid[ys, xs] == FREE_SPACE
+            grid[ys[free], xs[free]] = tile
+
+        # Force entry points on borders: up to 100 attempts, keeping the first
+        # num_entry_points distinct cells
         max_attempts = 100
+        side = rng.integers(0, 4, max_attempts)  # top, bottom, left, right
+        along_x = rng.integers(1, width - 1, max_attempts)
+        along_y = rng.integers(1, height - 1, max_attempts)
+        ys = np.select([side == 0, side == 1, side == 2], [0, height - 1, along_y], along_y)
+        xs = np.select([side == 0, side == 1, side == 2], [along_x, along_x, 0], width - 1)
 
-        while len(entries) < num_entry_points and attempts < max_attempts:
-            attempts += 1
-            side = random.choice(['top', 'bottom', 'left', 'right'])
-
-            if side == 'top':
-                x, y = random.randint(1, width - 2), 0
-            elif side == 'bottom':
-                x, y = random.randint(1, width - 2), height - 1
-            elif side == 'left':
-                x, y = 0, random.randint(1, height - 2)
-            else:
-                x, y = width - 1, random.randint(1, height - 2)
-
-            grid[y, x] = ENTRY_POINT
-            entries.add((y, x))
+        _, first = np.unique(ys * width + xs, return_index=True)
+        chosen = np.sort(first)[:num_entry_points]
+        grid[ys[chosen], xs[chosen]] = ENTRY_POINT
 
-        # if len(entries) < num_entry_points:
-            # print(f"Only {len(entries)} entry points created (requested {num_entry_points}).")
+        # if len(chosen) < num_entry_points:
+            # print(f"Only {len(chosen)} entry points created (requested {num_entry_points}).")
 
         return grid
 
     def is_collision(self, x, y):
         if not (0 <= x < self.width and 0 <= y < self.height):
             return True
-        if self.grid[y, x] in {WALL, DOOR_CLOSED, OUT_OF_BOUNDS}:
-            return True
-        for drone in self.drones:
-            if drone.get_position() == (x, y) and drone.active:
-                return True
-        return False
+        return bool(self.blocked[y, x] or self.occupancy[y, x] > 0)
+
+    def has_other_drone(self, drone, x, y):
+        """
+        True if any drone other than drone (active or not) is at (x, y).
+        """
+        count = self.presence[y, x]
+        if drone.pos == (x, y):
+            count -= 1
+        return count > 0
+
+    def mark_activated(self, drone):
+        x, y = drone.pos
+        self.occupancy[y, x] += 1
+
+    def mark_moved(self, drone, old_pos):
+        """
+        Keep occupancy in sync after drone moved from old_pos to drone.pos.
+        """
+        ox, oy = old_pos
+        x, y = drone.pos
+        self.presence[oy, ox] -= 1
+        self.presence[y, x] += 1
+        if drone.active:
+            self.occupancy[oy, ox] -= 1
+            self.occupancy[y, x] += 1
+        self.positions[self.drone_index[drone.id]] = (x, y)
 
     def get_tile(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
@@ -140,27 +177,43 @@ class GridMapEnv:
         return OUT_OF_BOUNDS
 
     def find_entry_points(self):
-        entry_points = [(y, x) for y in range(self.height)
-                        for x in range(self.width)
-                        if self.grid[y, x] == ENTRY_POINT]
+        if self.map_assets is not None:
+            entry_points = [tuple(p) for p in self.map_assets.entry_points.tolist()]
+        else:
+            entry_points = [tuple(p) for p in np.argwhere(self.grid == ENTRY_POINT).tolist()]
 
         if not entry_points:
-            # Find all cells with values 0, 1, or 2
-            candidates = [(y, x) for y in range(self.height)
-                          for x in range(self.width)
-                          if self.grid[y, x] in [FREE_SPACE, DOOR_OPEN, WINDOW]]
-
-            if candidates:
-                y, x = random.choice(candidates)
-                original = self.grid[y, x]
-                # Invert value cyclically: 0 → 2, 1 → 0, 2 → 1
-                inverted = {0: 2, 1: 0, 2: 1}[original]
+            # Pick a random walkable cell (row-major order, as before) and make it the entry.
+            # Counted in bands of rows, so a memory-mapped map is never loaded whole;
+            # randrange(n) draws the same index as choice() over the n candidates
+            bands = range(0, self.height, ENTRY_SCAN_ROWS)
+            counts = [np.count_nonzero(np.isin(self.grid[y:y + ENTRY_SCAN_ROWS], WALKABLE_TILES)) for y in bands]
+
+            if sum(counts):
+                k = self.rng.randrange(sum(counts))
+                band = int(np.searchsorted(np.cumsum(counts), k, side="right"))
+                y0 = band * ENTRY_SCAN_ROWS
+                y, x = np.argwhere(np.isin(self.grid[y0:y0 + ENTRY_SCAN_ROWS], WALKABLE_TILES))[k - sum(counts[:band])]
+                y, x = int(y) + y0, int(x)
+                if not self.grid.flags.writeable:
+                    self.grid = self._writable_grid()
                 self.grid[y, x] = ENTRY_POINT
-                # print(f"No entry points found. Converted cell ({y}, {x}) from {original} to ENTRY_POINT (was inverted to {inverted}).")
+                # print(f"No entry points found. Converted cell ({y}, {x}) to ENTRY_POINT.")
                 entry_points = [(y, x)]
 
         return entry_points
 
+    def _writable_grid(self):
+        """
+        A private, writable version of the shared read-only map. A binary
+        map file is mapped again copy-on-write, so a write only copies the
+        page it touches; an in-memory map is copied.
+        """
+        mapped = self.grid.base
+        if isinstance(mapped, np.memmap) and mapped.filename is not None:
+            return np.asarray(np.load(mapped.filename, mmap_mode="c"))
+        return self.grid.copy()
+
     @staticmethod
     def print_legend():
         for k, v in TILE_NAME.items():
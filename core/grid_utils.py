@@ -0,0 +1,90 @@
+import numpy as np
+
+NEIGHBOURS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def dilate(mask):
+    """
+    Cells 4-adjacent to a True cell of mask (over the last two axes).
+    """
+    grown = np.zeros_like(mask)
+    grown[..., 1:, :] |= mask[..., :-1, :]
+    grown[..., :-1, :] |= mask[..., 1:, :]
+    grown[..., :, 1:] |= mask[..., :, :-1]
+    grown[..., :, :-1] |= mask[..., :, 1:]
+    return grown
+
+
+def flood_fill(passable, seeds):
+    """
+    Cells 4-connected to seeds ((y, x) pairs) through passable cells.
+
+    Breadth-first over index arrays: each iteration expands only the previous
+    ring, so the total work is linear in the filled area. Seeds are always
+    included, passable or not.
+    """
+    height, width = passable.shape
+    passable = passable.reshape(-1)
+    filled = np.zeros(height * width, dtype=bool)
+
+    seeds = np.asarray(seeds, dtype=np.int64).reshape(-1, 2)
+    ring = np.unique(seeds[:, 0] * width + seeds[:, 1])
+    filled[ring] = True
+
+    while len(ring):
+        x = ring % width
+        steps = [ring[x > 0] - 1, ring[x < width - 1] + 1, ring[ring >= width] - width,
+                 ring[ring < (height - 1) * width] + width]
+        ring = np.unique(np.concatenate(steps))
+        ring = ring[passable[ring] & ~filled[ring]]
+        filled[ring] = True
+
+    return filled.reshape(height, width)
+
+
+def distance_fields(passable, sources, targets=None, min_reached=None):
+    """
+    Path distance from each source ((x, y)) to every cell, 4-connected
+    through passable cells: an (N, H * W) int32 array, -1 = unreachable or
+    not reached.
+
+    All sources grow their rings together over index arrays, like
+    flood_fill. With targets (flat cell ids) the wave stops as soon as every
+    source has reached all targets, or min_reached of them. Cells beyond
+    the last ring are left at -1, so they are at least one step further
+    away than any labelled cell.
+    """
+    height, width = passable.shape
+    size = height * width
+    passable = passable.reshape(-1)
+    sources = np.asarray(sources, dtype=np.int64).reshape(-1, 2)
+    dist = np.full((len(sources), size), -1, dtype=np.int32)
+    flat_dist = dist.reshape(-1)
+    slot = np.empty(flat_dist.size, dtype=np.int64)
+
+    # Ring entries are layer * size + cell
+    ring = np.arange(len(sources)) * size + sources[:, 1] * width + sources[:, 0]
+    flat_dist[ring] = 0
+    if targets is not None:
+        targets = np.asarray(targets, dtype=np.int64)
+
+    d = 0
+    while len(ring):
+        if targets is not None:
+            reached = (dist[:, targets] >= 0).sum(axis=1)
+            if (reached >= min(len(targets), min_reached or len(targets))).all():
+                break
+        d += 1
+        cell = ring % size
+        x = cell % width
+        steps = [ring[x > 0] - 1, ring[x < width - 1] + 1, ring[cell >= width] - width,
+                 ring[cell < size - width] + width]
+        ring = np.concatenate(steps)
+        ring = ring[passable[ring % size] & (flat_dist[ring] < 0)]
+        # Drop duplicates without sorting: keep the last write per cell
+        order = np.arange(len(ring))
+        slot[ring] = order
+        ring = ring[slot[ring] == order]
+        flat_dist[ring] = d
+
+    return dist
@@ -0,0 +1,292 @@
+import heapq
+from collections import deque
+import numpy as np
+from core import profiling
+from core.grid_utils import distance_fields
+from core.planner import get_planner
+
+SECTOR_SIZE = 16     # side of the square sectors the map is split into
+LONG_ENTRANCE = 6    # entrances at least this wide get a transition at both ends
+
+_GOAL = (-1, -1)     # sentinel node for the goal in the abstract search
+
+
+class SectorGraph:
+    """
+    Hierarchical path planning (HPA*) over the known map.
+
+    The map is split into square sectors. Every maximal run of open cells
+    along the border of two sectors is an entrance (a doorway, a window or
+    a stretch of open floor), represented by one transition (two for wide
+    entrances): a pair of facing cells. The abstract graph has the
+    transition cells as nodes, edges of cost 1 across each transition and
+    edges between the nodes of a sector weighted by their path distance
+    inside that sector.
+
+    Queries plan on the abstract graph first and then refine every hop with
+    a search confined to one sector, so their cost grows with the number of
+    sectors crossed rather than with the area of the map. Passability is
+    the same as a_star (-1 = unknown and passable); sectors are built on
+    first use and rebuilt after mark_blocked reports a change in them, so
+    the graph follows the map as it is revealed.
+
+    Paths are optimal at the abstract level only: within a sector they go
+    through transition cells, which makes them a few steps longer than a
+    grid search would.
+    """
+
+    def __init__(self, height, width, sector_size=SECTOR_SIZE):
+        self.height = height
+        self.width = width
+        self.size = sector_size
+        self.rows = -(-height // sector_size)
+        self.cols = -(-width // sector_size)
+        self.borders = {}  # (sector, right or lower neighbour) -> [(cell, cell)]
+        self.edges = {}    # sector -> {node: [(node, cost)]}, intra-sector and crossing edges
+        self.built = 0     # sectors (re)built so far
+
+    # Sectors are ids row * cols + col
+
+    def sector_of(self, pos):
+        return (pos[1] // self.size) * self.cols + pos[0] // self.size
+
+    def _bounds(self, sector):
+        row, col = divmod(sector, self.cols)
+        x0, y0 = col * self.size, row * self.size
+        return x0, y0, min(x0 + self.size, self.width), min(y0 + self.size, self.height)
+
+    def _neighbours(self, sector):
+        row, col = divmod(sector, self.cols)
+        if col > 0:
+            yield sector - 1
+        if col < self.cols - 1:
+            yield sector + 1
+        if row > 0:
+            yield sector - self.cols
+        if row < self.rows - 1:
+            yield sector + self.cols
+
+    def mark_blocked(self, xs, ys):
+        """
+        Invalidate the sectors holding the cells (arrays) that became
+        blocking. Their neighbours go too: they share the border entrances.
+        """
+        if len(xs) == 0:
+            return
+        sectors = np.unique((np.asarray(ys) // self.size) * self.cols + np.asarray(xs) // self.size)
+        for sector in sectors.tolist():
+            for other in self._neighbours(sector):
+                self.borders.pop((min(sector, other), max(sector, other)), None)
+                self.edges.pop(other, None)
+            self.edges.pop(sector, None)
+
+    def _border(self, a, b, grid):
+        """
+        Transitions between sector a and its right or lower neighbour b.
+        """
+        key = (a, b)
+        transitions = self.borders.get(key)
+        if transitions is not None:
+            return transitions
+
+        x0, y0, x1, y1 = self._bounds(a)
+        if b == a + 1 and a % self.cols < self.cols - 1:
+            # Vertical border: column x1 - 1 of a faces column x1 of b
+            cells_a = [(x1 - 1, y) for y in range(y0, y1)]
+            dx, dy = 1, 0
+        else:
+            cells_a = [(x, y1 - 1) for x in range(x0, x1)]
+            dx, dy = 0, 1
+        side_a = grid[cells_a[0][1]:cells_a[-1][1] + 1, cells_a[0][0]:cells_a[-1][0] + 1].reshape(-1)
+        side_b = grid[cells_a[0][1] + dy:cells_a[-1][1] + dy + 1, cells_a[0][0] + dx:cells_a[-1][0] + dx + 1].reshape(-1)
+        blocked = np.isin(side_a, (1, 3, 6)) | np.isin(side_b, (1, 3, 6))  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+
+        transitions = []
+        run_start = None
+        for i, closed in enumerate(blocked.tolist() + [True]):
+            if not closed:
+                if run_start is None:
+                    run_start = i
+                continue
+            if run_start is None:
+                continue
+            length = i - run_start
+            picks = (run_start, i - 1) if length >= LONG_ENTRANCE else (run_start + length // 2,)
+            for k in picks:
+                x, y = cells_a[k]
+                transitions.append(((x, y), (x + dx, y + dy)))
+            run_start = None
+
+        self.borders[key] = transitions
+        return transitions
+
+    def _sector_edges(self, sector, grid):
+        edges = self.edges.get(sector)
+        if edges is not None:
+            return edges
+
+        edges = {}
+        for other in self._neighbours(sector):
+            a, b = min(sector, other), max(sector, other)
+            for cell_a, cell_b in self._border(a, b, grid):
+                mine, theirs = (cell_a, cell_b) if sector == a else (cell_b, cell_a)
+                edges.setdefault(mine, []).append((theirs, 1))
+
+        # Distances between the nodes, all grown together inside the sector
+        nodes = list(edges)
+        if len(nodes) > 1:
+            x0, y0, x1, y1 = self._bounds(sector)
+            passable = ~np.isin(grid[y0:y1, x0:x1], (1, 3, 6))  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+            local = [(x - x0, y - y0) for x, y in nodes]
+            ids = np.array([y * (x1 - x0) + x for x, y in local])
+            costs = distance_fields(passable, local, ids)[:, ids].tolist()
+            for node, row in zip(nodes, costs):
+                for other, cost in zip(nodes, row):
+                    if cost > 0:
+                        edges[node].append((other, cost))
+
+        self.edges[sector] = edges
+        self.built += 1
+        profiling.active.count("sector_builds")
+        return edges
+
+    def _local_costs(self, pos, cells, grid):
+        """
+        (cell, distance) for every cell of cells reachable from pos without
+        leaving pos's sector.
+        """
+        x0, y0, x1, y1 = self._bounds(self.sector_of(pos))
+        w = x1 - x0
+        field = get_planner(y1 - y0, w).distance_field((pos[0] - x0, pos[1] - y0), grid[y0:y1, x0:x1])
+        costs = []
+        for x, y in cells:
+            d = int(field[(y - y0) * w + x - x0])
+            if d >= 0:
+                costs.append(((x, y), d))
+        return costs
+
+    def _local_path(self, start, goal, grid):
+        x0, y0, x1, y1 = self._bounds(self.sector_of(start))
+        local = get_planner(y1 - y0, x1 - x0).a_star((start[0] - x0, start[1] - y0), (goal[0] - x0, goal[1] - y0),
+                                                      grid[y0:y1, x0:x1])
+        return [(x + x0, y + y0) for x, y in local]
+
+    def _links(self, pos, grid):
+        """
+        Abstract edges out of pos, which need not be a node.
+        """
+        edges = self._sector_edges(self.sector_of(pos), grid)
+        if pos in edges:
+            return edges[pos]
+        return self._local_costs(pos, list(edges), grid)
+
+    def _refine(self, route, grid):
+        path = deque()
+        for a, b in zip(route, route[1:]):
+            if self.sector_of(a) == self.sector_of(b):
+                path.extend(self._local_path(a, b, grid))
+            else:
+                path.append(b)  # across a transition
+        return path
+
+    def _route(self, parent, node):
+        route = [node]
+        while node in parent:
+            node = parent[node]
+            route.append(node)
+        route.reverse()
+        return route
+
+    @profiling.timed("hierarchical_search")
+    def find_path(self, start, goal, grid):
+        """
+        Path from start (exclusive) to goal (inclusive) as a deque of (x, y),
+        like a_star, or an empty deque if the goal is unreachable.
+        """
+        if start == goal:
+            return deque()
+        goal_sector = self.sector_of(goal)
+        goal_edges = self._sector_edges(goal_sector, grid)
+        to_goal = dict(self._local_costs(goal, list(goal_edges), grid))
+
+        gx, gy = goal
+        best = {start: 0}
+        parent = {}
+        heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start)]
+        found = False
+        while heap:
+            _, d, node = heapq.heappop(heap)
+            if node == _GOAL:
+                found = True
+                break
+            if d > best[node]:
+                continue
+
+            links = list(self._links(node, grid))
+            if self.sector_of(node) == goal_sector:
+                if node == start:
+                    direct = self._local_costs(start, [goal], grid)
+                    if direct:
+                        links.append((_GOAL, direct[0][1]))
+                if node in to_goal:
+                    links.append((_GOAL, to_goal[node]))
+
+            for other, cost in links:
+                nd = d + cost
+                if nd < best.get(other, nd + 1):
+                    best[other] = nd
+                    parent[other] = node
+                    h = 0 if other == _GOAL else abs(other[0] - gx) + abs(other[1] - gy)
+                    heapq.heappush(heap, (nd + h, nd, other))
+
+        if not found:
+            return deque()
+        route = self._route(parent, parent[_GOAL])
+        if route[-1] != goal:
+            route.append(goal)
+        return self._refine(route, grid)
+
+    @profiling.timed("hierarchical_search")
+    def nearest_target(self, start, grid, targets):
+        """
+        Closest target by abstract path distance, for targets (set of (x, y))
+        too far away for a grid wave. Dijkstra over the abstract graph; each
+        sector holding targets is entered through its reached nodes and
+        searched locally. Returns (target, path) with path as in find_path,
+        or (None, None) if no target is reachable.
+        """
+        by_sector = {}
+        for target in targets:
+            if target != start:
+                by_sector.setdefault(self.sector_of(target), []).append(target)
+        if not by_sector:
+            return None, None  # don't flood the whole graph for nothing
+
+        best = {start: 0}
+        parent = {}
+        reached = {}  # target -> (distance, node it is reached from)
+        heap = [(0, start, False)]
+        while heap:
+            d, node, is_target = heapq.heappop(heap)
+            if is_target:
+                route = self._route(parent, reached[node][1])
+                route.append(node)
+                return node, self._refine(route, grid)
+            if d > best[node]:
+                continue
+
+            candidates = by_sector.get(self.sector_of(node))
+            if candidates:
+                for target, cost in self._local_costs(node, candidates, grid):
+                    if d + cost < reached.get(target, (d + cost + 1,))[0]:
+                        reached[target] = (d + cost, node)
+                        heapq.heappush(heap, (d + cost, target, True))
+
+            for other, cost in self._links(node, grid):
+                nd = d + cost
+                if nd < best.get(other, nd + 1):
+                    best[other] = nd
+                    parent[other] = node
+                    heapq.heappush(heap, (nd, other, False))
+
+        return None, None
@@ -0,0 +1,161 @@
+import glob
+import hashlib
+import os
+import numpy as np
+
+ENTRY_POINT = 2
+
+# On-disk store: one directory of .npy files per map content hash, loaded
+# memory-mapped so repeated runs (and sweep workers) share the page cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache")
+
+_ASSETS = {}   # content hash -> MapAssets
+_HASHES = {}   # (path, mtime, size) -> content hash
+
+
+def content_hash(path):
+    stat = os.stat(path)
+    file_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    key = _HASHES.get(file_key)
+    if key is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        key = digest.hexdigest()[:24]
+        _HASHES[file_key] = key
+    return key
+
+
+class MapAssets:
+    """
+    Read-only preprocessing artifacts of one map file, keyed by content hash.
+
+    Artifacts are computed once, kept in memory and written to cache_dir
+    (None disables the disk store). Arrays handed out are not writeable.
+    """
+
+    def __init__(self, key, cache_dir=CACHE_DIR):
+        self.key = key
+        self.dir = os.path.join(cache_dir, key) if cache_dir else None
+        self._arrays = {}
+        self._reachable = {}  # (y, x) of the entry a mask was grown from -> mask
+
+        if self.dir and os.path.isdir(self.dir):
+            for path in glob.glob(os.path.join(self.dir, "reachable_*.npy")):
+                y, x = os.path.basename(path)[len("reachable_"):-len(".npy")].split("_")
+                self._reachable[(int(y), int(x))] = _load(path)
+
+    @property
+    def grid(self):
+        return self._arrays["grid"]
+
+    @property
+    def entry_points(self):
+        """
+        (y, x) of ENTRY_POINT tiles in the file, as a (K, 2) array.
+        """
+        return self._arrays["entry_points"]
+
+    def array(self, name, compute):
+        arr = self._arrays.get(name)
+        if arr is not None:
+            return arr
+
+        path = os.path.join(self.dir, name + ".npy") if self.dir else None
+        if path and os.path.exists(path):
+            arr = _load(path)
+        else:
+            arr = np.asarray(compute())
+            arr.setflags(write=False)
+            if path:
+                self._save(path, arr)
+        self._arrays[name] = arr
+        return arr
+
+    def reachable_mask(self, entry_points, compute):
+        """
+        Reachable mask for a set of entry points.
+
+        The mask grown from one entry only depends on the walkable component
+        that entry sits in, and the mask of several entries is the union of
+        the single-entry masks. Masks are therefore stored per component and
+        reused by any entry point inside it. compute(entry) builds the mask
+        for a single (y, x) entry.
+        """
+        result = None
+        for y, x in entry_points:
+            mask = next((m for m in self._reachable.values() if m[y, x]), None)
+            if mask is None:
+                mask = np.asarray(compute((y, x)))
+                mask.setflags(write=False)
+                self._reachable[(y, x)] = mask
+                if self.dir:
+                    self._save(os.path.join(self.dir, f"reachable_{y}_{x}.npy"), mask)
+            result = mask if result is None else result | mask
+        return result
+
+    def _save(self, path, arr):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)  # atomic, safe with concurrent sweep workers
+
+
+def _load(path):
+    # Plain ndarray view of the memory map: np.memmap indexing goes through a
+    # Python-level __getitem__, which is slow for per-cell lookups
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+
+def load_map_assets(path, cache_dir=CACHE_DIR):
+    """
+    Return the (shared) MapAssets for a map file, parsing it only on the
+    first call for its content.
+
+    Binary maps (.npy, see convert_map) are not parsed or copied at all: the
+    file itself is memory-mapped, so only the pages the simulation touches
+    are ever read.
+    """
+    key = content_hash(path)
+    assets = _ASSETS.get(key)
+    if assets is None:
+        assets = MapAssets(key, cache_dir)
+        if path.endswith(".npy"):
+            grid = assets._arrays["grid"] = _load(path)
+        else:
+            grid = assets.array("grid", lambda: np.loadtxt(path, dtype=np.int8))
+        assets.array("entry_points", lambda: find_tiles(grid, ENTRY_POINT))
+        _ASSETS[key] = assets
+    return assets
+
+
+def find_tiles(grid, tile, rows=1024):
+    """
+    (y, x) of every cell of grid equal to tile, as a (K, 2) array. The grid
+    is scanned in bands of rows, so a memory-mapped map never needs a
+    full-size temporary.
+    """
+    found = [np.argwhere(grid[y:y + rows] == tile) + (y, 0) for y in range(0, grid.shape[0], rows)]
+    return np.concatenate(found) if found else np.empty((0, 2), dtype=np.int64)
+
+
+def convert_map(text_path, out_path):
+    """
+    Convert a text map (one row of tile values per line) into a binary .npy
+    map, streaming row by row so maps larger than memory can be converted.
+    """
+    with open(text_path) as f:
+        width = len(f.readline().split())
+        height = 1 + sum(1 for line in f if line.strip())
+
+    grid = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.int8, shape=(height, width))
+    with open(text_path) as f:
+        y = 0
+        for line in f:
+            if line.strip():
+                grid[y] = np.array(line.split(), dtype=np.int8)
+                y += 1
+    grid.flush()
+    del grid
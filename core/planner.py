@@ -0,0 +1,296 @@
+import heapq
+from collections import deque
+import numpy as np
+from core import profiling
+
+# WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+BLOCKING_TILES = (1, 3, 6)
+
+_PLANNERS = {}
+
+
+class GridPlanner:
+    """
+    Grid search with preallocated flat buffers indexed by y * width + x.
+
+    Buffers are reused between calls. Instead of clearing them, every search
+    gets a new stamp and an entry only counts if its stamp matches, so a call
+    never pays for the size of the map. Python-level access goes through
+    memoryviews of the NumPy arrays, which is much cheaper than NumPy scalar
+    indexing.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        size = height * width
+
+        self.g_score = np.zeros(size, dtype=np.int32)
+        self.parent = np.full(size, -1, dtype=np.int32)
+        self.seen = np.zeros(size, dtype=np.uint32)    # stamp when g_score was set
+        self.closed = np.zeros(size, dtype=np.uint32)  # stamp when expanded
+        self.stamp = 0
+        self._wave_start = -1
+
+        self._g = memoryview(self.g_score)
+        self._parent = memoryview(self.parent)
+        self._seen = memoryview(self.seen)
+        self._closed = memoryview(self.closed)
+
+    def _next_stamp(self):
+        self.stamp += 1
+        if self.stamp == np.iinfo(np.uint32).max:
+            self.seen[:] = 0
+            self.closed[:] = 0
+            self.stamp = 1
+        return self.stamp
+
+    @profiling.timed("astar")
+    def a_star(self, start, goal, grid):
+        """
+        4-connected A* with a Manhattan heuristic over grid (tile values,
+        -1 = unknown and passable). Returns the path from start (exclusive)
+        to goal (inclusive) as a deque of (x, y), or an empty deque if the
+        goal is unreachable.
+
+        Open-set ties are broken on (f, x, y), so the path is the same one the
+        original dict-based implementation produced.
+        """
+        height, width = self.height, self.width
+        stamp = self._next_stamp()
+        g, parent, seen, closed = self._g, self._parent, self._seen, self._closed
+        cells = memoryview(np.ascontiguousarray(grid).reshape(-1))
+
+        sx, sy = start
+        gx, gy = goal
+        s = sy * width + sx
+        g[s] = 0
+        seen[s] = stamp
+        parent[s] = -1
+
+        # Heap keys pack (f, x, y) into one int with the same ordering
+        key_scale = width * height
+        open_set = [sx * height + sy]
+        found = False
+        expanded = 0
+
+        while open_set:
+            key = heapq.heappop(open_set)
+            y = key % height
+            x = (key // height) % width
+            current = y * width + x
+            if closed[current] == stamp:
+                continue  # stale entry
+            closed[current] = stamp
+            expanded += 1
+
+            if x == gx and y == gy:
+                found = True
+                break
+
+            tentative_g = g[current] + 1
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                neighbor = ny * width + nx
+                tile = cells[neighbor]
+                if tile == 1 or tile == 3 or tile == 6:  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+                    continue
+                if closed[neighbor] == stamp:
+                    continue
+                if seen[neighbor] != stamp or tentative_g < g[neighbor]:
+                    seen[neighbor] = stamp
+                    g[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    f_score = tentative_g + abs(nx - gx) + abs(ny - gy)
+                    heapq.heappush(open_set, f_score * key_scale + nx * height + ny)
+
+        profiling.active.count("astar_expansions", expanded)
+        if not found:
+            return deque()
+        return self._trace(gy * width + gx, s)
+
+    @profiling.timed("wave")
+    def nearest_targets(self, start, grid, targets, max_distance=None):
+        """
+        Breadth-first wave from start over grid (same passability as a_star)
+        that stops once every target at the smallest path distance is found.
+
+        targets is a set of (x, y) tuples.
+        Returns (reached, distance): the targets ((x, y) tuples) at that
+        distance in the order the wave reached them, or ([], None) if no
+        target is reachable (within max_distance steps, if given). start itself never counts as a target. Paths to
+        the reached targets come from the same wave, see path_to.
+        """
+        height, width = self.height, self.width
+        stamp = self._next_stamp()
+        g, parent, seen = self._g, self._parent, self._seen
+        cells = memoryview(np.ascontiguousarray(grid).reshape(-1))
+
+        sx, sy = start
+        s = sy * width + sx
+        g[s] = 0
+        seen[s] = stamp
+        parent[s] = -1
+        self._wave_start = s
+
+        # Membership is tested per dequeued cell rather than by converting
+        # targets up front: the wave is usually far smaller than the target set
+        reached = []
+        best = None
+        queue = deque([s])
+        expanded = 0
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            dist = g[current]
+            if best is not None and dist > best:
+                break
+            if max_distance is not None and dist > max_distance:
+                break
+            x, y = current % width, current // width
+            if current != s and (x, y) in targets:
+                reached.append((x, y))
+                best = dist
+                continue
+
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                neighbor = ny * width + nx
+                if seen[neighbor] == stamp:
+                    continue
+                tile = cells[neighbor]
+                if tile == 1 or tile == 3 or tile == 6:  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+                    continue
+                seen[neighbor] = stamp
+                g[neighbor] = dist + 1
+                parent[neighbor] = current
+                queue.append(neighbor)
+
+        profiling.active.count("wave_expansions", expanded)
+        return reached, best
+
+    @profiling.timed("wave")
+    def target_distances(self, start, grid, targets, count, max_distance=None):
+        """
+        Breadth-first wave like nearest_targets that goes on until count
+        targets (and every other target at the same distance) are found.
+
+        Returns (reached, distances, radius): the targets in the order the
+        wave reached them, their path distances, and how far the wave got
+        (None if it covered everything reachable from start). Targets not
+        reached are further than radius steps away. Paths to the reached
+        targets come from the same wave, see path_to.
+        """
+        height, width = self.height, self.width
+        stamp = self._next_stamp()
+        g, parent, seen = self._g, self._parent, self._seen
+        cells = memoryview(np.ascontiguousarray(grid).reshape(-1))
+
+        sx, sy = start
+        s = sy * width + sx
+        g[s] = 0
+        seen[s] = stamp
+        parent[s] = -1
+        self._wave_start = s
+
+        reached = []
+        distances = []
+        radius = None
+        queue = deque([s])
+        expanded = 0
+        while queue:
+            current = queue.popleft()
+            dist = g[current]
+            if len(reached) >= count and dist > distances[-1] or max_distance is not None and dist > max_distance:
+                radius = dist - 1
+                break
+            expanded += 1
+            x, y = current % width, current // width
+            if current != s and (x, y) in targets:
+                reached.append((x, y))
+                distances.append(dist)
+
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                neighbor = ny * width + nx
+                if seen[neighbor] == stamp:
+                    continue
+                tile = cells[neighbor]
+                if tile == 1 or tile == 3 or tile == 6:  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+                    continue
+                seen[neighbor] = stamp
+                g[neighbor] = dist + 1
+                parent[neighbor] = current
+                queue.append(neighbor)
+
+        profiling.active.count("wave_expansions", expanded)
+        return reached, distances, radius
+
+    @profiling.timed("distance_field")
+    def distance_field(self, source, grid):
+        """
+        Path distance from source to every cell (same passability as a_star),
+        as a flat int32 array indexed by y * width + x; -1 = unreachable.
+        """
+        height, width = self.height, self.width
+        cells = memoryview(np.ascontiguousarray(grid).reshape(-1))
+        field = np.full(height * width, -1, dtype=np.int32)
+        dist = memoryview(field)
+
+        sx, sy = source
+        s = sy * width + sx
+        dist[s] = 0
+        queue = deque([s])
+        while queue:
+            current = queue.popleft()
+            d = dist[current] + 1
+            x, y = current % width, current // width
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                neighbor = ny * width + nx
+                if dist[neighbor] != -1:
+                    continue
+                tile = cells[neighbor]
+                if tile == 1 or tile == 3 or tile == 6:  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+                    continue
+                dist[neighbor] = d
+                queue.append(neighbor)
+
+        return field
+
+    def path_to(self, goal):
+        """
+        Path (deque of (x, y), start exclusive) to a target reached by the
+        last nearest_targets or target_distances call.
+        """
+        x, y = goal
+        return self._trace(y * self.width + x, self._wave_start)
+
+    def _trace(self, node, start):
+        parent = self._parent
+        width = self.width
+        path = deque()
+        while node != start:
+            path.appendleft((node % width, node // width))
+            node = parent[node]
+        return path
+
+
+def get_planner(height, width):
+    """
+    Return a shared GridPlanner for the given map size.
+    """
+    planner = _PLANNERS.get((height, width))
+    if planner is None:
+        planner = GridPlanner(height, width)
+        _PLANNERS[(height, width)] = planner
+    return planner
+
+
+def a_star(start, goal, grid):
+    height, width = grid.shape
+    return get_planner(height, width).a_star(start, goal, grid)
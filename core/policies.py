@@ -0,0 +1,550 @@
+import numpy as np
+from collections import deque
+from core.frontiers import cluster_frontiers
+from core.assignment import linear_sum_assignment
+from core.planner import GridPlanner, get_planner
+from core.cooperative import CooperativePlanner, DIRECTION_OF
+from core.dstar_lite import DStarLite
+from core import profiling
+from core.hierarchy import SectorGraph, SECTOR_SIZE
+
+DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT', 'STAY']
+
+# WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+BLOCKING_TILES = (1, 3, 6)
+
+# Clustered policy. Tuned on the house maps, where it needs fewer ticks than
+# the frontier policy at every drone count (see src/run_policy_comparison.py).
+# Small clusters matter most: with 2 cells a drone re-picks its cluster after
+# about every cell, and a gain term (any weight) only cost ticks there
+REASSIGN_INTERVAL = 5   # ticks between joint assignment rounds (idle drones are assigned sooner)
+MAX_CLUSTER_SIZE = 2    # frontier cells per cluster
+GAIN_WEIGHT = 0.0       # path steps a frontier cell of a cluster is worth
+CROWD_PENALTY = 10.0    # extra cost for each further drone sent to the same cluster
+ASSIGN_RADIUS = 64      # cluster distances are measured by a wave within this many cells of a drone
+SPACING_WEIGHT = 1.0    # path steps a cell of mean distance from the other drones is worth
+
+# Hierarchical policy: frontiers within this many steps are found by a grid wave
+LOCAL_RADIUS = 2 * SECTOR_SIZE
+
+POLICIES = {}  # name -> ExplorationPolicy subclass
+
+
+def register_policy(name):
+    """
+    Class decorator adding an ExplorationPolicy to POLICIES under name.
+    """
+    def register(cls):
+        cls.name = name
+        POLICIES[name] = cls
+        return cls
+    return register
+
+
+def make_policy(name):
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy {name!r}, expected one of {sorted(POLICIES)}")
+    return POLICIES[name]()
+
+
+class ExplorationPolicy:
+    """
+    Decides where drones move. world is the MasterController: it owns the
+    environment (world.env), the merged map (world.global_map), the frontier
+    set (world.frontiers) and the current tick (world.tick).
+
+    Per tick the controller iterates plan_all(drones, world), which yields
+    (drone, direction) pairs, and moves each drone as soon as its pair is
+    produced. The default plan_all calls plan once per drone, lazily, so a
+    drone plans after the drones before it have moved and their discoveries
+    are merged. Policies that decide for the whole swarm at once override
+    plan_all and return all pairs in one go.
+
+    drones includes inactive drones (their moves are no-ops). A direction of
+    None means the drone does not act at all this tick.
+    """
+
+    name = None
+
+    def setup(self, world):
+        """
+        Called once by the controller before the first tick.
+        """
+
+    def observe(self, xs, ys, vals):
+        """
+        Called with every batch of cells that just became known (arrays).
+        """
+
+    def plan(self, drone, world):
+        raise NotImplementedError
+
+    def plan_all(self, drones, world):
+        for drone in drones:
+            yield drone, self.plan(drone, world)
+
+
+@register_policy("random")
+class RandomPolicy(ExplorationPolicy):
+    def plan(self, drone, world):
+        return random_direction(drone, world.env)
+
+
+def random_direction(drone, env):
+    """
+    Simple algorithm: try a random direction; if it fails (collision), try another.
+    """
+    directions = env.rng.sample(DIRECTIONS, len(DIRECTIONS))  # shuffle
+
+    for direction in directions:
+        dx, dy = {
+            'UP': (0, -1),
+            'DOWN': (0, 1),
+            'LEFT': (-1, 0),
+            'RIGHT': (1, 0),
+            'STAY': (0, 0)
+        }[direction]
+
+        new_x = drone.pos[0] + dx
+        new_y = drone.pos[1] + dy
+
+        if not env.is_collision(new_x, new_y):
+            return direction
+
+    # All directions blocked — stay
+    return 'STAY'
+
+
+@register_policy("frontier")
+class FrontierPolicy(ExplorationPolicy):
+    """
+    Every drone heads for the closest frontier not yet claimed this tick,
+    waiting (up to max_wait ticks) when another drone is in the way.
+    """
+
+    def __init__(self):
+        self.max_wait = 3  # maximum steps to wait before replay
+        self.assigned_goals = set()
+
+    def setup(self, world):
+        drones = world.env.drones
+        self.goals = {d.id: None for d in drones}
+        self.paths = {d.id: deque() for d in drones}
+        self.wait_counters = {d.id: 0 for d in drones}
+        self.planner = GridPlanner(world.env.height, world.env.width)
+
+    def plan_all(self, drones, world):
+        self.assigned_goals = set()
+        return super().plan_all(drones, world)
+
+    def plan(self, drone, world):
+        id = drone.id
+        global_map = world.global_map
+
+        # Check if goal is invalid, reached, or path exhausted
+        goal = self.goals[id]
+        if not goal or global_map[goal[1], goal[0]] != -1 or not self.paths[id]:
+            available_frontiers = world.frontiers - self.assigned_goals
+            if not available_frontiers:
+                # print(f"[Warning] No available_frontiers for Drone {id}. Random walk. at time {world.tick}")
+                return random_direction(drone, world.env)
+
+            best_goal = self.choose_goal(drone, world, available_frontiers)
+            if best_goal:
+                self.goals[id] = best_goal
+                self.paths[id] = self.planner.path_to(best_goal)
+                self.assigned_goals.add(best_goal)
+            else:
+                # print(f"[Warning] No valid goal for Drone {id}. Random walk. at time {world.tick}")
+                return random_direction(drone, world.env)
+
+        return self.follow_path(drone, world)
+
+    @profiling.timed("goal_selection")
+    def choose_goal(self, drone, world, available_frontiers, max_distance=None):
+        """
+        Closest available frontier by path distance (at most max_distance
+        steps away, if given), ties broken by spacing from the other drones.
+        The wave it runs is reused by planner.path_to.
+        """
+        # Step 1: find the closest frontiers by true path distance, in one wave
+        closest_frontiers = self.closest_frontiers(drone, world, available_frontiers, max_distance)
+
+        # Step 2: maximize spacing from other drones
+        best_goal = None
+        max_spacing = -1
+        for f in closest_frontiers:
+            dists = np.hypot(*(world.env.positions - f).T)
+            spacing = dists.sum() - dists[world.env.drone_index[drone.id]]
+            if spacing > max_spacing:
+                best_goal = f
+                max_spacing = spacing
+        return best_goal
+
+    def closest_frontiers(self, drone, world, available_frontiers, max_distance):
+        closest_frontiers, _ = self.planner.nearest_targets(drone.pos, world.global_map, available_frontiers,
+                                                            max_distance)
+        return closest_frontiers
+
+    def follow_path(self, drone, world):
+        """
+        Next step along self.paths[drone.id], waiting (up to max_wait ticks,
+        then random walking) while another drone is in the way.
+        """
+        id = drone.id
+        current_pos = drone.pos
+
+        # Move along path
+        if self.paths[id]:
+            next_pos = self.paths[id][0]
+
+            # If next position is occupied, wait
+            blocked = world.env.has_other_drone(drone, *next_pos)
+
+            if blocked:
+                self.wait_counters[id] += 1
+                if self.wait_counters[id] >= self.max_wait:
+                    # print(f"[Info] Drone {id} waited too long. Replanting. at time {world.tick}")
+                    self.goals[id] = None
+                    self.paths[id] = deque()
+                    self.wait_counters[id] = 0
+                    return random_direction(drone, world.env)
+                else:
+                    # print(f"[Info] Drone {id} blocked by another. Waiting ({self.wait_counters[id]}/{self.max_wait}).")
+                    return 'STAY'
+
+            # Safe to move
+            self.wait_counters[id] = 0  # Reset wait counter
+            self.paths[id].popleft()
+            dx, dy = next_pos[0] - current_pos[0], next_pos[1] - current_pos[1]
+            direction_map = {(0, -1): 'UP', (0, 1): 'DOWN', (-1, 0): 'LEFT', (1, 0): 'RIGHT'}
+            return direction_map.get((dx, dy), 'STAY')
+        return None
+
+
+@register_policy("cooperative")
+class CooperativePolicy(FrontierPolicy):
+    """
+    Frontier exploration where drones plan around each other instead of
+    waiting. The goal and spatial path are picked like in FrontierPolicy;
+    the first window of that path is then checked against the reservations
+    of the drones that planned before this one in the tick. A conflicting
+    path is replaced by a windowed space-time A* detour (see core.cooperative).
+    """
+
+    def setup(self, world):
+        super().setup(world)
+        self.cooperative = CooperativePlanner(world.env.height, world.env.width)
+
+    def plan_all(self, drones, world):
+        self.cooperative.begin_tick([d for d in drones if d.active])
+        return super().plan_all(drones, world)
+
+    def plan(self, drone, world):
+        if not drone.active:
+            return None
+
+        id = drone.id
+        available_frontiers = world.frontiers - self.assigned_goals
+        goal = self.choose_goal(drone, world, available_frontiers) if available_frontiers else None
+        self.goals[id] = goal
+
+        path = None
+        if goal:
+            self.assigned_goals.add(goal)
+            path = self.cooperative.plan(drone, goal, world.global_map, self.planner.path_to(goal))
+
+        if path is None:
+            return self.cooperative.wander(drone, world.env)
+
+        (x0, y0), (x1, y1) = path[0], path[1]
+        return DIRECTION_OF[(x1 - x0, y1 - y0)]
+
+
+@register_policy("incremental")
+class IncrementalPolicy(FrontierPolicy):
+    """
+    Frontier exploration with goals kept until reached (or no longer a
+    frontier) and one D* Lite search per drone. Walls and closed doors
+    discovered since the drone's last step are fed to its search, which
+    repairs only the part of the path they affect.
+    """
+
+    def setup(self, world):
+        super().setup(world)
+        self.searches = {}
+        self.obstacle_log = []  # cells discovered to be blocking, in order
+        self.obstacle_cursor = {d.id: 0 for d in world.env.drones}
+
+    def observe(self, xs, ys, vals):
+        blocking = (vals == 1) | (vals == 3) | (vals == 6)  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+        self.obstacle_log.extend(zip(xs[blocking].tolist(), ys[blocking].tolist()))
+
+    def plan(self, drone, world):
+        if not drone.active:
+            return None
+
+        id = drone.id
+        goal = self.goals[id]
+        search = self.searches.get(id)
+        if not goal or goal == drone.pos or goal not in world.frontiers or search is None:
+            available_frontiers = world.frontiers - self.assigned_goals
+            goal = self.choose_goal(drone, world, available_frontiers) if available_frontiers else None
+            self.goals[id] = goal
+            if not goal:
+                self.searches.pop(id, None)
+                return random_direction(drone, world.env)
+            search = self.searches[id] = DStarLite(world.global_map, drone.pos, goal)
+        else:
+            search.move_to(drone.pos)
+            search.update_cells(self.obstacle_log[self.obstacle_cursor[id]:])
+        self.obstacle_cursor[id] = len(self.obstacle_log)
+        self.assigned_goals.add(goal)
+
+        search.compute()
+        next_pos = search.next_step()
+        if next_pos is None:
+            # Goal walled off: pick another one next tick
+            self.goals[id] = None
+            self.searches.pop(id, None)
+            return random_direction(drone, world.env)
+
+        # Same waiting rule as FrontierPolicy
+        if world.env.has_other_drone(drone, *next_pos):
+            self.wait_counters[id] += 1
+            if self.wait_counters[id] >= self.max_wait:
+                self.goals[id] = None
+                self.searches.pop(id, None)
+                self.wait_counters[id] = 0
+                return random_direction(drone, world.env)
+            return 'STAY'
+
+        self.wait_counters[id] = 0
+        dx, dy = next_pos[0] - drone.pos[0], next_pos[1] - drone.pos[1]
+        return DIRECTION_OF[(dx, dy)]
+
+
+@register_policy("hierarchical")
+class HierarchicalPolicy(FrontierPolicy):
+    """
+    Frontier exploration for large maps. The grid wave of FrontierPolicy is
+    cut off after LOCAL_RADIUS steps; when it finds nothing, the closest
+    frontier is searched for on the sector graph (see core.hierarchy) and
+    the resulting path is kept until its goal is no longer a frontier or a
+    wall turns up on it, so a far goal costs a search over sector entrances
+    instead of the whole grid. Within LOCAL_RADIUS goals are chosen like in
+    FrontierPolicy, but unlike there the choice is made again every tick
+    (the windowed wave is cheap), so a drone switches to a closer frontier
+    as soon as one appears.
+
+    The local wave runs on the window of the map within LOCAL_RADIUS of the
+    drone, so no search buffer scales with the map: together with chunked
+    maps (GridMapEnv chunk_size) this is the policy for very large maps.
+    """
+
+    def setup(self, world):
+        drones = world.env.drones
+        self.goals = {d.id: None for d in drones}
+        self.paths = {d.id: deque() for d in drones}
+        self.wait_counters = {d.id: 0 for d in drones}
+        self.planner = None         # window planner of the last local wave
+        self.window_origin = (0, 0)
+        self.sectors = SectorGraph(world.env.height, world.env.width)
+        self.blocked_cells = []  # every blocking cell observed, in order
+        self.path_cells = {d.id: (set(), 0) for d in drones}  # cells of paths[id], len(blocked_cells) then
+
+    def closest_frontiers(self, drone, world, available_frontiers, max_distance):
+        # Paths of at most max_distance steps stay inside this window
+        x, y = drone.pos
+        x0, y0 = max(0, x - max_distance), max(0, y - max_distance)
+        x1, y1 = min(world.env.width, x + max_distance + 1), min(world.env.height, y + max_distance + 1)
+        targets = _ShiftedTargets(available_frontiers, x0, y0)
+        self.planner = get_planner(y1 - y0, x1 - x0)
+        self.window_origin = (x0, y0)
+        reached, _ = self.planner.nearest_targets((x - x0, y - y0), world.global_map[y0:y1, x0:x1], targets,
+                                                  max_distance)
+        return [(fx + x0, fy + y0) for fx, fy in reached]
+
+    def window_path(self, goal):
+        x0, y0 = self.window_origin
+        return deque((x + x0, y + y0) for x, y in self.planner.path_to((goal[0] - x0, goal[1] - y0)))
+
+    def observe(self, xs, ys, vals):
+        blocking = (vals == 1) | (vals == 3) | (vals == 6)  # WALL, DOOR_CLOSED, OUT_OF_BOUNDS
+        self.sectors.mark_blocked(xs[blocking], ys[blocking])
+        self.blocked_cells.extend(zip(xs[blocking].tolist(), ys[blocking].tolist()))
+
+    def path_blocked(self, drone):
+        """
+        Whether a wall observed since the drone's path was planned lies on
+        it (only the walls found since the last check are looked at).
+        """
+        cells, seen = self.path_cells[drone.id]
+        self.path_cells[drone.id] = (cells, len(self.blocked_cells))
+        return any(cell in cells for cell in self.blocked_cells[seen:])
+
+    def plan(self, drone, world):
+        id = drone.id
+        global_map = world.global_map
+        available_frontiers = world.frontiers - self.assigned_goals
+        if not available_frontiers:
+            return random_direction(drone, world.env)
+
+        goal = self.choose_goal(drone, world, available_frontiers, LOCAL_RADIUS)
+        if goal:
+            path = self.window_path(goal)
+            self.path_cells[id] = (set(path), len(self.blocked_cells))
+        else:
+            # Nothing nearby: keep heading for the far goal while it is valid
+            goal, path = self.goals[id], self.paths[id]
+            if not goal or goal not in available_frontiers or not path or self.path_blocked(drone):
+                goal, path = self.sectors.nearest_target(drone.pos, global_map, available_frontiers)
+                self.path_cells[id] = (set(path or ()), len(self.blocked_cells))
+            if not goal:
+                return random_direction(drone, world.env)
+
+        self.goals[id] = goal
+        self.paths[id] = path
+        self.assigned_goals.add(goal)
+        return self.follow_path(drone, world)
+
+
+class _ShiftedTargets:
+    """
+    Membership test for window coordinates against a set of map
+    coordinates, so the frontier set is never copied per wave.
+    """
+
+    def __init__(self, targets, x0, y0):
+        self.targets = targets
+        self.x0 = x0
+        self.y0 = y0
+
+    def __contains__(self, pos):
+        return (pos[0] + self.x0, pos[1] + self.y0) in self.targets
+
+
+@register_policy("clustered")
+class ClusteredPolicy(FrontierPolicy):
+    """
+    Frontier cells are grouped into clusters and all active drones are
+    assigned to clusters jointly (once per round, in plan_all); each drone
+    then heads for the nearest remaining cell of its cluster.
+    """
+
+    def setup(self, world):
+        super().setup(world)
+        self.cluster_targets = {d.id: set() for d in world.env.drones}
+        self.last_assignment = -REASSIGN_INTERVAL
+        self.assignment_rounds = 0
+
+    def plan_all(self, drones, world):
+        self.assign_clusters([d for d in drones if d.active], world)
+        return super().plan_all(drones, world)
+
+    @profiling.timed("goal_selection")
+    def assign_clusters(self, drones, world):
+        """
+        Cluster bookkeeping, once per tick.
+
+        The frontiers are grouped into clusters and all active drones get
+        one cluster each in a joint assignment that minimizes path distance
+        minus information gain (cluster size), every REASSIGN_INTERVAL
+        ticks. In between, drones that have run out of work (their goal was
+        explored or their path used up) are assigned on their own.
+        """
+        if not drones:
+            return
+        frontiers = world.frontiers
+        idle = [d for d in drones if self.goals[d.id] not in frontiers or not self.paths[d.id]]
+        due = world.tick - self.last_assignment >= REASSIGN_INTERVAL
+        if not idle and not due:
+            return
+        clusters = cluster_frontiers(frontiers, MAX_CLUSTER_SIZE)
+        if not clusters:
+            return
+        busy = []
+        if due:
+            self.last_assignment = world.tick
+        else:
+            busy = [d for d in drones if d not in idle]
+            drones = idle
+        self.assignment_rounds += 1
+
+        label = {cell: j for j, c in enumerate(clusters) for cell in c.cells}
+
+        # Path distance from each drone to the nearest cell of each cluster.
+        # Each drone's wave stops once it has reached a whole cluster, or
+        # after ASSIGN_RADIUS steps. The clusters it didn't reach get a lower
+        # bound: their Manhattan distance, and at least one step more than
+        # the wave got (or a large penalty if the wave ran out of cells, so
+        # they are unreachable)
+        cost = []
+        routes = []
+        for drone in drones:
+            reached, dists, radius = self.planner.target_distances(drone.pos, world.global_map, frontiers,
+                                                                   MAX_CLUSTER_SIZE, ASSIGN_RADIUS)
+            if radius is None:
+                row = [world.env.width * world.env.height] * len(clusters)
+            else:
+                x, y = drone.pos
+                row = [max(radius + 1, min(abs(cx - x) + abs(cy - y) for cx, cy in c.cells)) for c in clusters]
+            for cell, d in zip(reversed(reached), reversed(dists)):
+                row[label[cell]] = d
+            cost.append(row)
+            # The next wave overwrites this one, so the paths to the nearest
+            # cell of every cluster it reached are taken now
+            nearest = {}
+            for cell in reached:
+                nearest.setdefault(label[cell], cell)
+            routes.append({j: (cell, self.planner.path_to(cell)) for j, cell in nearest.items()})
+        cost = np.array(cost, dtype=np.float64) - GAIN_WEIGHT * np.array([c.size for c in clusters])
+
+        # Clusters far from the other drones are cheaper, so drones spread out
+        positions = world.env.positions
+        if len(positions) > 1:
+            centroids = np.array([c.centroid for c in clusters])
+            spread = np.hypot(*(positions[:, None, :] - centroids[None, :, :]).transpose(2, 0, 1))
+            spacing = spread.sum(axis=0)[None, :] - spread[[world.env.drone_index[d.id] for d in drones]]
+            cost -= SPACING_WEIGHT * spacing / (len(positions) - 1)
+        # Between full rounds only the idle drones are assigned, away from
+        # the clusters the busy ones are heading for
+        held = [label[self.goals[d.id]] for d in busy if self.goals[d.id] in label]
+        if held:
+            cost[:, held] += CROWD_PENALTY
+        # Fewer clusters than drones: offer every cluster several times, each
+        # further copy a little more expensive so drones still spread out
+        copies = -(-len(drones) // len(clusters))
+        if copies > 1:
+            cost = np.hstack([cost + k * CROWD_PENALTY for k in range(copies)])
+
+        # A drone sent to a cluster its wave reached gets its path from
+        # there, otherwise plan finds one
+        rows, cols = linear_sum_assignment(cost)
+        for i, col in zip(rows, cols):
+            j = col % len(clusters)
+            id = drones[i].id
+            self.cluster_targets[id] = set(clusters[j].cells)
+            if self.goals[id] not in self.cluster_targets[id] and j in routes[i]:
+                self.goals[id], self.paths[id] = routes[i][j]
+
+    def plan(self, drone, world):
+        if not drone.active:
+            return None
+
+        id = drone.id
+        # Cells explored earlier this tick by other drones drop out
+        targets = self.cluster_targets[id] & world.frontiers
+
+        goal = self.goals[id]
+        if not goal or goal not in targets or not self.paths[id]:
+            if not targets:
+                return random_direction(drone, world.env)
+            reached, _ = self.planner.nearest_targets(drone.pos, world.global_map, targets)
+            if not reached:
+                return random_direction(drone, world.env)
+            goal = reached[0]
+            self.goals[id] = goal
+            self.paths[id] = self.planner.path_to(goal)
+
+        return self.follow_path(drone, world)
@@ -0,0 +1,127 @@
+import functools
+import json
+import os
+import time
+
+# Phases may nest (search runs inside plan, frontier_update inside merge),
+# so their times are inclusive.
+
+
+class Profiler:
+    """
+    Per-phase wall-clock timers and event counters for one run.
+
+        with profiling.active.phase("sense"):
+            ...
+        profiling.active.count("rays_cast", n)
+
+    Instrumented code always goes through profiling.active, which is a
+    NullProfiler unless a run installs a Profiler with enable().
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.times = {}   # phase -> seconds
+        self.calls = {}   # phase -> times entered
+        self.counts = {}  # counter -> total
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def report(self):
+        return {
+            "phases": {name: {"calls": self.calls[name], "time": round(self.times[name], 6)}
+                       for name in sorted(self.times)},
+            "counts": dict(sorted(self.counts.items())),
+        }
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profiler, name = self.profiler, self.name
+        profiler.times[name] = profiler.times.get(name, 0.0) + elapsed
+        profiler.calls[name] = profiler.calls.get(name, 0) + 1
+
+
+class NullProfiler:
+    """
+    Disabled profiler: phases and counters do nothing.
+    """
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, n=1):
+        pass
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+NULL_PROFILER = NullProfiler()
+
+active = NULL_PROFILER  # read as profiling.active, it is swapped by enable/disable
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as phase name. Disabled, it
+    costs one extra call and a flag check.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = active
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def export(path, report, **info):
+    """
+    Write a Profiler report, plus info (e.g. the run's parameters), as JSON.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(dict(info, **report), f, indent=2)
+
+
+def enable():
+    """
+    Install a fresh Profiler for the current process and return it.
+    """
+    global active
+    active = Profiler()
+    return active
+
+
+def disable():
+    global active
+    active = NULL_PROFILER
@@ -0,0 +1,227 @@
+import os
+import numpy as np
+from core import profiling
+from core.grid_map_env import (
+    WALL, FREE_SPACE, ENTRY_POINT, DOOR_CLOSED, DOOR_OPEN, WINDOW, OUT_OF_BOUNDS
+)
+
+try:
+    import imageio  # optional, for video files
+except ImportError:
+    imageio = None
+
+TILE_SIZE = 20
+MAX_PANEL_SIZE = 900  # largest side of one map panel in pixels; tiles shrink to fit
+BACKGROUND = (20, 20, 20)
+
+TRUE_COLORS = {
+    WALL: (100, 100, 100),
+    FREE_SPACE: (60, 60, 60),
+    ENTRY_POINT: (0, 255, 255),
+    DOOR_CLOSED: (255, 0, 0),
+    DOOR_OPEN: (0, 200, 0),
+    WINDOW: (0, 0, 255),
+    OUT_OF_BOUNDS: (0, 0, 0)
+}
+OBSERVED_COLORS = {**TRUE_COLORS, FREE_SPACE: (200, 200, 200), -1: BACKGROUND}
+
+LEGEND_ITEMS = [
+    ("Free", (200, 200, 200)),
+    ("Wall", (100, 100, 100)),
+    ("Entry", (0, 255, 255)),
+    ("Door (Closed)", (255, 0, 0)),
+    ("Door (Open)", (0, 200, 0)),
+    ("Window", (0, 0, 255)),
+    ("Out of Bounds", (0, 0, 0)),
+    ("Drone", (255, 255, 0)),
+]
+
+
+def make_palette(colors, default):
+    """
+    (256, 3) uint8 lookup table from tile value (int8 viewed as uint8) to RGB.
+    """
+    palette = np.empty((256, 3), dtype=np.uint8)
+    palette[:] = default
+    for tile, color in colors.items():
+        palette[tile & 0xFF] = color
+    return palette
+
+
+TRUE_PALETTE = make_palette(TRUE_COLORS, (120, 120, 120))
+OBSERVED_PALETTE = make_palette(OBSERVED_COLORS, (150, 150, 150))
+
+
+class Renderer:
+    """
+    Draws the true map (left), the merged observed map (right), the drones,
+    a progress bar and a legend.
+
+    Maps are turned into pixels with a palette lookup and pushed through
+    pygame.surfarray in one go. The true map and the legend never change and
+    are drawn once; the observed panel keeps its own surface, on which only
+    the cells that changed since the last frame are repainted.
+
+    offscreen=True renders into a plain Surface, without opening a window,
+    for writing frames or videos (see FrameRecorder).
+    """
+
+    def __init__(self, env, offscreen=False, tile_size=None):
+        import pygame
+        self.pygame = pygame
+        self.env = env
+        self.offscreen = offscreen
+
+        height, width = env.height, env.width
+        self.tile = tile_size or max(1, min(TILE_SIZE, MAX_PANEL_SIZE // max(height, width)))
+        self.gap = 1 if self.tile >= 4 else 0  # grid lines between tiles
+        self.panel_width = self.tile * width
+        self.panel_height = self.tile * height
+        self.observed_left = self.panel_width + 50
+        self.width = self.panel_width * 2 + 50
+        self.height = self.panel_height + 160
+
+        if offscreen:
+            pygame.font.init()
+            self.screen = pygame.Surface((self.width, self.height))
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption("Multi-Agent SLAM Simulation")
+        self.font = pygame.font.SysFont("Arial", 16)
+
+        # What the observed panel currently shows
+        self.shown = np.full((height, width), -1, dtype=np.int8)
+        self.observed_surface = self._map_surface(self.shown, OBSERVED_PALETTE)
+        self.background = self._background()
+        self.labels = {}  # drone id -> rendered label
+
+    def _map_surface(self, grid, palette):
+        rgb = palette[np.asarray(grid).view(np.uint8)]  # (H, W, 3)
+        tile, gap = self.tile, self.gap
+        pixels = np.repeat(np.repeat(rgb, tile, axis=0), tile, axis=1)
+        if gap:
+            pixels[tile - 1::tile, :] = BACKGROUND
+            pixels[:, tile - 1::tile] = BACKGROUND
+        surface = self.pygame.Surface((self.panel_width, self.panel_height))
+        self.pygame.surfarray.blit_array(surface, pixels.transpose(1, 0, 2))  # surfarray is (x, y)
+        return surface
+
+    def _background(self):
+        pygame = self.pygame
+        background = pygame.Surface((self.width, self.height))
+        background.fill(BACKGROUND)
+        background.blit(self._map_surface(self.env.grid, TRUE_PALETTE), (0, 0))
+
+        legend_y = self.height - 36
+        box_size = 14
+        spacing_x = 140
+        start_x = (self.width - len(LEGEND_ITEMS) * spacing_x) // 2
+        for i, (label, color) in enumerate(LEGEND_ITEMS):
+            x = start_x + i * spacing_x
+            pygame.draw.rect(background, color, (x, legend_y, box_size, box_size))
+            background.blit(self.font.render(label, True, (255, 255, 255)), (x + box_size + 6, legend_y - 2))
+        return background
+
+    def update(self, global_map):
+        """
+        Repaint the observed panel cells that differ from global_map.
+        Returns the number of cells repainted.
+        """
+        current = np.asarray(global_map)
+        ys, xs = np.nonzero(current != self.shown)
+        if len(ys):
+            vals = current[ys, xs]
+            self.shown[ys, xs] = vals
+            colors = OBSERVED_PALETTE[vals.view(np.uint8)].tolist()
+            tile, size = self.tile, self.tile - self.gap
+            fill = self.observed_surface.fill
+            for x, y, color in zip(xs.tolist(), ys.tolist(), colors):
+                fill(color, (x * tile, y * tile, size, size))
+        return len(ys)
+
+    def draw(self, coverage, elapsed=None, message=None, status=None):
+        """
+        Compose a frame: static layer, observed panel, drones and status
+        (by default the elapsed time).
+        """
+        pygame, screen, font, tile = self.pygame, self.screen, self.font, self.tile
+        screen.blit(self.background, (0, 0))
+        screen.blit(self.observed_surface, (self.observed_left, 0))
+
+        radius = max(1, min(5, tile // 4))
+        for drone in self.env.drones:
+            if drone.active:
+                dx, dy = drone.get_position()
+                pygame.draw.circle(screen, (255, 255, 0), (dx * tile + tile // 2, dy * tile + tile // 2), radius)
+                if tile >= 10:
+                    label = self.labels.get(drone.id)
+                    if label is None:
+                        label = self.labels[drone.id] = font.render(str(drone.id), True, (0, 0, 0))
+                    screen.blit(label, (self.observed_left + dx * tile + 5, dy * tile))
+
+        # Progress bar
+        bar_top = self.height - 100
+        bar_width = self.width - 100
+        pygame.draw.rect(screen, (80, 80, 80), (50, bar_top, bar_width, 24))
+        pygame.draw.rect(screen, (0, 255, 0), (50, bar_top, int(bar_width * coverage), 24))
+        screen.blit(font.render(f"Progress: {int(coverage * 100)}%", True, (255, 255, 255)), (50, bar_top - 20))
+        if status is None:
+            status = f"Time: {elapsed:.2f}s"
+        screen.blit(font.render(status, True, (255, 255, 255)), (self.width - 140, bar_top - 20))
+
+        if message:
+            rendered = font.render(message, True, (0, 255, 255))
+            screen.blit(rendered, ((self.width - rendered.get_width()) // 2, bar_top - 50))
+
+        if not self.offscreen:
+            pygame.display.flip()
+
+    def frame(self):
+        """
+        Current frame as an (H, W, 3) uint8 array.
+        """
+        return self.pygame.surfarray.array3d(self.screen).transpose(1, 0, 2)
+
+    def close(self):
+        if not self.offscreen:
+            self.pygame.quit()
+
+
+class FrameRecorder:
+    """
+    Collects rendered frames into a video file (.mp4, .gif, ...; needs the
+    optional imageio package) or, for any other path, a directory of
+    numbered PNG frames.
+    """
+
+    def __init__(self, path, fps=30):
+        self.path = path
+        self.frames = 0
+        self.writer = None
+        if os.path.splitext(path)[1]:
+            if imageio is None:
+                raise ImportError(f"Writing {path} needs imageio; pass a directory to get PNG frames")
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.writer = imageio.get_writer(path, fps=fps)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def add(self, renderer):
+        with profiling.active.phase("record"):
+            if self.writer is not None:
+                self.writer.append_data(renderer.frame())
+            else:
+                renderer.pygame.image.save(renderer.screen, os.path.join(self.path, f"frame_{self.frames:06d}.png"))
+            self.frames += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def default_video_path(base):
+    """
+    base + ".mp4" when imageio is installed, else base as a frame directory.
+    """
+    return base + ".mp4" if imageio is not None else base
@@ -0,0 +1,141 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+    FORMAT = "parquet"
+except ImportError:
+    FORMAT = "csv"
+
+# Schema: column -> dtype on load
+RUN_COLUMNS = {
+    "map": "int32",
+    "drones": "int16",
+    "policy": "category",
+    "iteration": "int32",
+    "seed": "int64",
+    "ticks": "Int32",        # nullable: None when not solved
+    "ticks_run": "Int32",
+    "wall_time": "float64",
+    "final_coverage": "float32",
+    "status": "category",
+}
+COVERAGE_COLUMNS = {
+    "map": "int32",
+    "drones": "int16",
+    "policy": "category",
+    "iteration": "int32",
+    "tick": "int32",
+    "coverage": "float32",
+}
+KEY = ["map", "drones", "policy", "iteration"]
+
+
+def typed(frame, columns):
+    """
+    frame with the schema's columns (missing ones as nulls) and dtypes.
+    """
+    for name in columns:
+        if name not in frame:
+            frame[name] = None
+    return frame[list(columns)].astype(columns)
+
+
+class ResultsStore:
+    """
+    Sweep results as a directory of columnar part files:
+
+        runs-NNNNN.<ext>      one row per run (RUN_COLUMNS)
+        coverage-NNNNN.<ext>  one row per run and tick (COVERAGE_COLUMNS)
+
+    <ext> is parquet when pyarrow is installed, csv otherwise; both are read
+    back. Rows are buffered and written as a new part every flush_every runs
+    (and on close), so an interrupted sweep loses at most one batch and
+    parts never have to be rewritten. A part is written under a temporary
+    name and then renamed, and the runs part of a batch goes first: a run
+    counts as done once its row is stored, so an interruption can at
+    worst lose a batch's coverage, never store coverage of runs that will
+    be run again.
+    """
+
+    def __init__(self, path, format=FORMAT, flush_every=8):
+        self.path = path
+        self.format = format
+        self.flush_every = flush_every
+        self.rows = []
+        self.series = []  # coverage frames of the buffered runs
+
+    def _parts(self, kind):
+        return sorted(glob.glob(os.path.join(self.path, f"{kind}-*.parquet"))
+                      + glob.glob(os.path.join(self.path, f"{kind}-*.csv")))
+
+    def append(self, row, coverage=None):
+        """
+        Buffer one run: row has the RUN_COLUMNS (missing ones are null),
+        coverage is its per-tick coverage as a sequence, or None.
+        """
+        self.rows.append(row)
+        if coverage is not None and len(coverage):
+            coverage = np.asarray(coverage, dtype=np.float32)
+            frame = pd.DataFrame({"tick": np.arange(len(coverage), dtype=np.int32), "coverage": coverage})
+            for name in KEY:
+                frame[name] = row[name]
+            self.series.append(frame)
+        if len(self.rows) >= self.flush_every:
+            self.flush()
+
+    def _write(self, kind, frame, columns):
+        frame = typed(frame, columns)
+        part = os.path.join(self.path, f"{kind}-{len(self._parts(kind)):05d}.{self.format}")
+        partial = part + ".tmp"
+        if self.format == "parquet":
+            frame.to_parquet(partial, index=False)
+        else:
+            frame.to_csv(partial, index=False)
+        os.replace(partial, part)
+
+    def flush(self):
+        if not self.rows:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self._write("runs", pd.DataFrame(self.rows), RUN_COLUMNS)
+        if self.series:
+            self._write("coverage", pd.concat(self.series, ignore_index=True), COVERAGE_COLUMNS)
+        self.rows = []
+        self.series = []
+
+    def close(self):
+        self.flush()
+
+    def _read(self, kind, columns):
+        names = list(columns)
+        frames = [pd.read_parquet(part, columns=names) if part.endswith(".parquet")
+                  else pd.read_csv(part, usecols=names)
+                  for part in self._parts(kind)]
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=names)
+        return typed(frame, columns)
+
+    def runs(self):
+        """
+        Every stored run as one typed DataFrame. A retried run keeps only
+        its last row.
+        """
+        return self._read("runs", RUN_COLUMNS).drop_duplicates(KEY, keep="last", ignore_index=True)
+
+    def coverage(self):
+        """
+        Per-tick coverage of every stored run, long format.
+        """
+        return self._read("coverage", COVERAGE_COLUMNS)
+
+    def completed(self):
+        """
+        Keys (map, drones, policy, iteration) of the runs stored so far,
+        except those that ended in an error (a resumed sweep retries them).
+        """
+        runs = self._read("runs", {name: RUN_COLUMNS[name] for name in KEY + ["status"]})
+        runs = runs[runs["status"] != "error"]
+        return set(zip(runs["map"].tolist(), runs["drones"].tolist(), runs["policy"].astype(str).tolist(),
+                       runs["iteration"].tolist()))
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import numpy as np
+from core.map_cache import load_map_assets
+
+ENTRY_POINT = 2
+
+TRACE_VERSION = 1
+
+
+def grid_hash(grid):
+    """
+    Content hash of a map array (maps loaded from a file use map_cache's
+    hash of the file instead).
+    """
+    grid = np.ascontiguousarray(grid)
+    digest = hashlib.sha256(f"{grid.shape}{grid.dtype}".encode())
+    digest.update(grid.tobytes())
+    return digest.hexdigest()[:24]
+
+
+class TraceRecorder:
+    """
+    Records one run into a compact binary trace (see Replay):
+
+        positions  (T, N, 2) int16  x, y of every drone after each tick
+        active     (T, N) bits      whether each drone had entered the map
+        coverage   (T,) float32     coverage after each tick
+        cells      (D,) uint32      flat ids y * width + x of discovered cells
+        values     (D,) int8        their tiles, in discovery order
+        offsets    (T + 1,) uint32  cells[offsets[t]:offsets[t + 1]] were
+                                    discovered during tick t
+
+    plus the run's parameters and the map's hash. Maps from a file are
+    referenced by path and hash; generated ones are stored in the trace.
+
+    MasterController reports discoveries through discovered() and the end
+    of every tick through end_tick(); save() writes the trace.
+    """
+
+    def __init__(self, env, map_path=None, seed=None, **info):
+        self.env = env
+        coords = np.int16 if max(env.height, env.width) <= np.iinfo(np.int16).max else np.int32
+        self.coord_dtype = coords
+        self.meta = dict(info, version=TRACE_VERSION, map_path=map_path, seed=seed, height=env.height,
+                         width=env.width, drones=len(env.drones), entry_points=[list(p) for p in env.entry_points],
+                         entry_times=[d.entry_time for d in env.drones])
+        if env.map_assets is not None:
+            self.meta["map_hash"] = env.map_assets.key
+            self.grid = None
+        else:
+            self.meta["map_hash"] = grid_hash(env.grid)
+            self.grid = np.array(env.grid)
+        self.positions = []
+        self.active = []
+        self.coverage = []
+        self.cells = []
+        self.values = []
+        self.offsets = [0]
+        self.discoveries = 0
+
+    def discovered(self, xs, ys, vals):
+        """
+        Cells (arrays) that just became known in the global map.
+        """
+        if len(xs):
+            self.cells.append(np.asarray(ys, dtype=np.uint32) * self.env.width + np.asarray(xs, dtype=np.uint32))
+            self.values.append(np.asarray(vals, dtype=np.int8))
+            self.discoveries += len(xs)
+
+    def end_tick(self, coverage):
+        self.positions.append(self.env.positions.astype(self.coord_dtype))
+        self.active.append([d.active for d in self.env.drones])
+        self.coverage.append(coverage)
+        self.offsets.append(self.discoveries)
+
+    def save(self, path, **info):
+        """
+        Write the trace as a compressed .npz; info (e.g. the run's outcome)
+        is added to its parameters.
+        """
+        meta = dict(self.meta, ticks=len(self.coverage), **info)
+        num_drones = len(self.env.drones)
+        arrays = {
+            "meta": np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            "positions": np.array(self.positions, dtype=self.coord_dtype).reshape(-1, num_drones, 2),
+            "active": np.packbits(np.array(self.active, dtype=bool).reshape(-1, num_drones), axis=1),
+            "coverage": np.array(self.coverage, dtype=np.float32),
+            "cells": np.concatenate(self.cells) if self.cells else np.empty(0, dtype=np.uint32),
+            "values": np.concatenate(self.values) if self.values else np.empty(0, dtype=np.int8),
+            "offsets": np.array(self.offsets, dtype=np.uint32),
+        }
+        if self.grid is not None:
+            arrays["grid"] = self.grid
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+
+class _ReplayDrone:
+    """
+    Stand-in for Drone with what the renderer and analysis code read.
+    """
+
+    def __init__(self, drone_id, entry_time):
+        self.id = drone_id
+        self.entry_time = entry_time
+        self.pos = None
+        self.active = False
+
+    def get_position(self):
+        return self.pos
+
+
+class Replay:
+    """
+    Plays back a trace written by TraceRecorder without simulating.
+
+    seek(t) moves to the end of tick t: drone positions, activity and
+    global_map are then as they were in the run. Every cell is discovered
+    once, so global_map at tick t is just the first offsets[t + 1]
+    discoveries, and seeking either way only touches the cells in between.
+
+    A Replay has the height, width, grid and drones attributes of an
+    environment and can be handed to the renderer (see export_video).
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.meta = json.loads(data["meta"].tobytes().decode())
+            self.positions = data["positions"]
+            self.coverage = data["coverage"]
+            self.cells = data["cells"]
+            self.values = data["values"]
+            self.offsets = data["offsets"]
+            self.ticks = len(self.coverage)
+            num_drones = self.meta["drones"]
+            self.active = np.unpackbits(data["active"], axis=1, count=num_drones).astype(bool)
+            self.grid = data["grid"] if "grid" in data else None
+
+        self.height, self.width = self.meta["height"], self.meta["width"]
+        if self.grid is None:
+            self.grid = self._load_map()
+        self.drones = [_ReplayDrone(i, t) for i, t in enumerate(self.meta["entry_times"])]
+        self.global_map = np.full((self.height, self.width), -1, dtype=np.int8)
+        self.tick = -1  # before the first tick
+        if self.ticks:
+            self.seek(0)
+
+    def _load_map(self):
+        path = self.meta["map_path"]
+        assets = load_map_assets(path)
+        if assets.key != self.meta["map_hash"]:
+            raise ValueError(f"{path} changed since the run was recorded (hash {assets.key}, "
+                             f"trace has {self.meta['map_hash']})")
+        grid = np.array(assets.grid)
+        for y, x in self.meta["entry_points"]:
+            grid[y, x] = ENTRY_POINT  # a fallback entry point is not in the file
+        return grid
+
+    def seek(self, tick):
+        """
+        Move to the end of tick (0 <= tick < self.ticks).
+        """
+        if not 0 <= tick < self.ticks:
+            raise IndexError(f"tick {tick} outside the recorded 0..{self.ticks - 1}")
+        flat = self.global_map.reshape(-1)
+        now, then = self.offsets[self.tick + 1], self.offsets[tick + 1]
+        if then > now:
+            flat[self.cells[now:then]] = self.values[now:then]
+        elif then < now:
+            flat[self.cells[then:now]] = -1
+        for drone, pos, active in zip(self.drones, self.positions[tick].tolist(), self.active[tick].tolist()):
+            drone.pos = tuple(pos)
+            drone.active = active
+        self.tick = tick
+        return self
+
+    def __iter__(self):
+        """
+        Seek through every tick in order, yielding the tick.
+        """
+        for tick in range(self.ticks):
+            self.seek(tick)
+            yield tick
+
+    def discoveries(self, tick):
+        """
+        (xs, ys, vals) of the cells discovered during tick.
+        """
+        cells = self.cells[self.offsets[tick]:self.offsets[tick + 1]].astype(np.int64)
+        return cells % self.width, cells // self.width, self.values[self.offsets[tick]:self.offsets[tick + 1]]
+
+    def discovered_per_tick(self):
+        return np.diff(self.offsets.astype(np.int64))
+
+    def path(self, drone_id):
+        """
+        (T, 2) positions of one drone over the run.
+        """
+        return self.positions[:, drone_id]
+
+
+def export_video(trace_path, video_path, every=1, fps=30):
+    """
+    Re-render a recorded run into a video file or PNG frame directory (see
+    core.renderer.FrameRecorder).
+    """
+    from core.renderer import Renderer, FrameRecorder
+    replay = Replay(trace_path)
+    renderer = Renderer(replay, offscreen=True)
+    recorder = FrameRecorder(video_path, fps)
+    try:
+        for tick in replay:
+            last = tick == replay.ticks - 1
+            if tick % every and not last:
+                continue
+            renderer.update(replay.global_map)
+            message = None
+            if last and replay.meta.get("completed"):
+                message = f"Objective Achieved in {replay.ticks} ticks"
+            renderer.draw(float(replay.coverage[tick]), message=message, status=f"Tick: {tick + 1}")
+            recorder.add(renderer)
+    finally:
+        recorder.close()
+    return recorder.frames
@@ -0,0 +1,15 @@
+import glob
+import os
+from core.map_cache import convert_map
+
+# Text maps to convert, and where the binary (.npy) maps go. Binary maps are
+# memory-mapped on load instead of parsed, see core.map_cache.load_map_assets
+map_pattern = "../data/maps/*.txt"
+output_dir = "../data/maps_bin"
+
+os.makedirs(output_dir, exist_ok=True)
+for text_path in sorted(glob.glob(map_pattern)):
+    name = os.path.splitext(os.path.basename(text_path))[0]
+    out_path = os.path.join(output_dir, name + ".npy")
+    convert_map(text_path, out_path)
+    print(f"Converted {text_path} -> {out_path}")
@@ -1,14 +1,19 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from core.analytics import load_results, summarize, improvement
+
+# Results: a results store directory (see core.results_store) or a CSV, and
+# the metric plotted (e.g. "wall_time" or "ticks" for sweep results)
+RESULTS_PATH = "outputs/slam_results.csv"
+VALUE = "time"
 
 # === Load and clean data ===
-df = pd.read_csv("outputs/slam_results.csv")
+runs = load_results(RESULTS_PATH)
+summary = summarize(runs, VALUE)
+print(summary.to_string(index=False))
 
-# Remove maps where all runs failed
-valid_maps = df.groupby("map")["time"].apply(lambda x: x.notnull().any())
-df = df[df["map"].isin(valid_maps[valid_maps].index)]
-df = df[df["time"].notnull()]  # Drop remaining NaNs
+# Drop failed runs (maps where all runs failed go with them)
+df = runs[runs[VALUE].notnull()]
 
 # Set style
 sns.set(style="whitegrid")
@@ -18,30 +23,21 @@ fig, axes = plt.subplots(2, 2, figsize=(18, 12))
 fig.suptitle("SLAM Simulation Results by Map and Drone Count", fontsize=16)
 
 # === GRAPH 1: Completion Time per Map by Number of Drones ===
-sns.barplot(data=df, x="map", y="time", hue="drones", errorbar="sd", ax=axes[0, 0])
+sns.barplot(data=df, x="map", y=VALUE, hue="drones", errorbar="sd", ax=axes[0, 0])
 axes[0, 0].set_title("Completion Time per Map by Number of Drones")
 axes[0, 0].set_xlabel("Map Number")
 axes[0, 0].set_ylabel("Time (seconds)")
 axes[0, 0].legend(title="Drones")
 
 # === GRAPH 2: Boxplot of Completion Time by Drones ===
-sns.boxplot(data=df, x="drones", y="time", ax=axes[0, 1], showmeans=True,
+sns.boxplot(data=df, x="drones", y=VALUE, ax=axes[0, 1], showmeans=True,
             meanprops={"marker": "o", "color": "black"})
 axes[0, 1].set_title("Distribution of Completion Time by Drones")
 axes[0, 1].set_xlabel("Number of Drones")
 axes[0, 1].set_ylabel("Time (seconds)")
 
 # === GRAPH 3: Relative Improvement per Map ===
-improvement_data = []
-for map_id in sorted(df["map"].unique()):
-    prev_mean = None
-    for drone in sorted(df["drones"].unique()):
-        mean_time = df[(df["map"] == map_id) & (df["drones"] == drone)]["time"].mean()
-        improvement = ((prev_mean - mean_time) / prev_mean * 100) if prev_mean else None
-        improvement_data.append((map_id, drone, improvement))
-        prev_mean = mean_time
-
-improvement_df = pd.DataFrame(improvement_data, columns=["map", "drones", "relative_improvement"])
+improvement_df = improvement(summary)
 
 sns.barplot(data=improvement_df[improvement_df["relative_improvement"].notnull()],
             x="map", y="relative_improvement", hue="drones", ax=axes[1, 0])
@@ -50,10 +46,11 @@ axes[1, 0].set_xlabel("Map Number")
 axes[1, 0].set_ylabel("Improvement (%)")
 axes[1, 0].legend(title="Drones Added")
 
-# === GRAPH 4: Average Time per Drones (mean + std) ===
-avg_std = df.groupby("drones")["time"].agg(["mean", "std"]).reset_index()
-sns.barplot(data=avg_std, x="drones", y="mean", hue="drones", ax=axes[1, 1], errorbar="sd", legend=False)
-axes[1, 1].set_title("Average Completion Time per Drone Count")
+# === GRAPH 4: Average Time per Drones (mean + confidence interval) ===
+avg = summarize(runs, VALUE, by=["drones"])
+sns.barplot(data=avg, x="drones", y="mean", hue="drones", ax=axes[1, 1], legend=False)
+axes[1, 1].errorbar(range(len(avg)), avg["mean"], yerr=avg["mean"] - avg["ci_low"], fmt="none", color="black")
+axes[1, 1].set_title("Average Completion Time per Drone Count (95% CI)")
 axes[1, 1].set_xlabel("Number of Drones")
 axes[1, 1].set_ylabel("Average Time (seconds)")
 
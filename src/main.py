@@ -1,17 +1,21 @@
-import time
 import os
 import logging
-import gc
-from core.sim_runner import run_simulation
+from core.experiments import run_sweep, open_results, build_jobs
 from tqdm import tqdm
 
 # Configuration
 MAX_ITERATIONS = 30
-MAX_TIME = 50  # seconds
 MAP_COUNT = 10
 DRONE_COUNTS = [1, 2, 3]
-
-# Set up logging
+POLICIES = ["frontier"]  # registered names, see core.policies.POLICIES
+WORKERS = None  # None = one worker per CPU
+PROFILE = False  # write per-run phase profiles next to the results (see core.profiling)
+VIDEO = False  # render every run offscreen into videos / PNG frames next to the results
+VIDEO_EVERY = 10  # ticks between recorded frames
+RECORD = False  # write a replayable trace of every run next to the results (see core.trace)
+RESULTS_PATH = "../outputs/sweep_results"  # columnar store (see core.results_store); a .csv path writes flat CSV
+
+# Set up logging (errors from individual runs end up here)
 log_dir = "../data/logs"
 os.makedirs(log_dir, exist_ok=True)
 log_file = os.path.join(log_dir, "slam_run1.log")
@@ -24,36 +28,27 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-total_runs = MAP_COUNT * len(DRONE_COUNTS) * MAX_ITERATIONS
-
-with tqdm(total=total_runs, desc="Running Simulations", ncols=100) as pbar:
-    for map_idx in range(MAP_COUNT):
-        map_path = f"../data/maps/house_map_{map_idx}.txt"
-        for num_drones in DRONE_COUNTS:
-            for iteration in range(1, MAX_ITERATIONS + 1):
-                try:
-                    start = time.time()
-                    result = run_simulation(
-                        map_path=map_path,
-                        width=32,
-                        height=32,
-                        num_drones=num_drones,
-                        num_entry_points=1,
-                        fov=1,
-                        render=True
-                    )
-                    elapsed = time.time() - start
-
-                    if result is None or elapsed > MAX_TIME:
-                        logging.info(f"Map: {map_idx} | Iteration: {iteration} | Drones: {num_drones} | Time: not solved")
-                    else:
-                        logging.info(f"Map: {map_idx} | Iteration: {iteration} | Drones: {num_drones} | Time: {result:.2f} seconds")
-                except Exception as e:
-                    logging.info(f"Map: {map_idx} | Iteration: {iteration} | Drones: {num_drones} | Time: not solved | Error: {e}")
-
-                # Free memory
-                import pygame
-                pygame.quit()
-                gc.collect()
-
-                pbar.update(1)
+if __name__ == "__main__":
+    map_paths = {map_idx: f"../data/maps/house_map_{map_idx}.txt" for map_idx in range(MAP_COUNT)}
+    keys = {(job["map"], job["drones"], job["policy"], job["iteration"])
+            for job in build_jobs(map_paths, DRONE_COUNTS, MAX_ITERATIONS, policies=POLICIES)}
+    total_runs = len(keys)
+
+    # Resumed sweeps skip these; rows of other configurations don't count
+    already_done = len(keys & open_results(RESULTS_PATH).completed())
+
+    with tqdm(total=total_runs, initial=already_done, desc="Running Simulations", ncols=100) as pbar:
+        run_sweep(
+            map_paths,
+            DRONE_COUNTS,
+            MAX_ITERATIONS,
+            RESULTS_PATH,
+            workers=WORKERS,
+            fov=1,
+            on_result=lambda row: pbar.update(1),
+            policies=POLICIES,
+            profile=PROFILE,
+            video=VIDEO,
+            video_every=VIDEO_EVERY,
+            record=RECORD,
+        )
@@ -0,0 +1,31 @@
+import os
+import sys
+from core.benchmarks import run_suite, save_results, load_results, compare, format_comparison, format_time
+
+# Configuration
+SUITE = "quick"  # "quick", "full" or "policies", see core.benchmarks.SUITES
+ONLY = None  # e.g. ["sense", "a_star"] to run some benchmarks only
+REPEATS = 3
+SEED = 0
+THRESHOLD = 0.25  # slowdown (relative to the baseline) reported as a regression
+RESULTS_PATH = f"../outputs/benchmarks_{SUITE}.json"
+BASELINE_PATH = f"../outputs/benchmarks_{SUITE}_baseline.json"
+UPDATE_BASELINE = False  # store this run as the new baseline instead of comparing
+
+if __name__ == "__main__":
+    document = run_suite(SUITE, REPEATS, SEED, ONLY,
+                         on_result=lambda entry: print(f"{entry['key']:<60} {format_time(entry['time']):>10} / op"))
+    save_results(RESULTS_PATH, document)
+    print(f"Results written to {RESULTS_PATH}")
+
+    if UPDATE_BASELINE or not os.path.exists(BASELINE_PATH):
+        save_results(BASELINE_PATH, document)
+        print(f"Baseline written to {BASELINE_PATH}")
+        sys.exit(0)
+
+    rows = compare(document, load_results(BASELINE_PATH), THRESHOLD)
+    print(format_comparison(rows))
+    regressions = [row[0] for row in rows if row[4] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,25 @@
+from core.sim_runner import run_headless
+
+# Configuration
+MAP_PATH = None  # None = generated map of WIDTH x HEIGHT
+WIDTH = 96
+HEIGHT = 96
+DRONE_COUNTS = [4, 16, 64]
+COMM_RANGES = [None, 10]  # cells, None = unlimited
+POLICY = "frontier"
+MAX_TICKS = 150
+SEED = 0
+
+if __name__ == "__main__":
+    print(f"{'drones':>6} {'range':>6} {'ticks':>6} {'coverage':>9} {'bytes/tick':>11} {'messages':>9} "
+          f"{'beacon %':>9} {'latency':>8} {'max':>5} {'sync s':>7} {'total s':>8}")
+    for drones in DRONE_COUNTS:
+        for comm_range in COMM_RANGES:
+            result = run_headless(MAP_PATH, WIDTH, HEIGHT, drones, max_ticks=MAX_TICKS, seed=SEED, policy=POLICY,
+                                  decentralized=True, comm_range=comm_range)
+            comm = result["comm"]
+            beacons = 100 * comm["beacon_bytes"] / comm["bytes"] if comm["bytes"] else 0
+            latency = f"{comm['mean_latency']:.1f}" if comm["updates"] else "-"
+            print(f"{drones:>6} {str(comm_range):>6} {result['ticks_run']:>6} {result['coverage'][-1][1]:>9.3f} "
+                  f"{comm['bytes_per_tick']:>11.0f} {comm['messages']:>9} {beacons:>9.0f} {latency:>8} "
+                  f"{str(comm['max_latency']):>5} {comm['sync_time']:>7.2f} {result['wall_time']:>8.2f}")
@@ -0,0 +1,23 @@
+from core.sim_runner import run_headless
+
+# Configuration
+MAP_COUNT = 10
+SEEDS = [0, 1, 2]
+DRONE_COUNTS = [1, 3, 6, 12]
+POLICIES = ["frontier", "clustered"]
+MAX_TICKS = 3000
+
+if __name__ == "__main__":
+    map_paths = [f"../data/maps/house_map_{map_idx}.txt" for map_idx in range(MAP_COUNT)]
+    runs = len(map_paths) * len(SEEDS)
+    print(f"{'drones':>6} {'policy':>12} {'ticks':>8} {'wall s':>8} {'completed':>10}")
+    for drones in DRONE_COUNTS:
+        for policy in POLICIES:
+            ticks = wall_time = completed = 0
+            for map_path in map_paths:
+                for seed in SEEDS:
+                    result = run_headless(map_path, num_drones=drones, max_ticks=MAX_TICKS, seed=seed, policy=policy)
+                    ticks += result["ticks_run"]
+                    wall_time += result["wall_time"]
+                    completed += result["completed"]
+            print(f"{drones:>6} {policy:>12} {ticks / runs:>8.1f} {wall_time / runs:>8.3f} {completed:>5}/{runs}")
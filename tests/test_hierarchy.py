@@ -0,0 +1,18 @@
+import numpy as np
+from core.hierarchy import SectorGraph
+from core.sim_runner import run_headless
+
+
+def test_single_sector_column_path():
+    # Sector 1 lies below sector 0, so their border is horizontal
+    grid = np.zeros((80, 12), dtype=np.int8)
+    graph = SectorGraph(80, 12)
+    assert graph._border(0, 1, grid)[0][0][1] == 15
+    path = graph.find_path((0, 0), (11, 79), grid)
+    assert path and path[-1] == (11, 79)
+
+
+def test_single_sector_column_run():
+    for width in (12, 16):
+        result = run_headless(None, width, 90, 2, seed=3, policy="hierarchical")
+        assert result["ticks_run"] > 0